@@ -1,15 +1,115 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.utils import unquote
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Substr
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.text import smart_split, unescape_string_literal
 
+from core.constants import ADMIN_EXACT_COUNT_LIMIT, MAX_LENGTH_TEXT
+from core.paginator import EstimatedCountPaginator
+
+from .commentcounts import recount_comments
 from .models import Category, Comment, Location, Post
+from .surrogate import queue_purge
+
+User = get_user_model()
 
 admin.site.empty_value_display = 'Не задано'
 
+EXACT_COUNT_VAR = 'exact_count'
+
+
+class EstimatedCountAdminMixin:
+    """Список объектов без точного COUNT(*) на больших таблицах.
+
+    Ссылка с параметром `exact_count` включает точный подсчёт.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def changelist_view(self, request, extra_context=None):
+        request.exact_count = EXACT_COUNT_VAR in request.GET
+        if request.exact_count:
+            request.GET = request.GET.copy()
+            del request.GET[EXACT_COUNT_VAR]
+        return super().changelist_view(request, extra_context)
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        changelist.exact_count_url = changelist.get_query_string(
+            {EXACT_COUNT_VAR: 1}
+        )
+        return changelist
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        paginator = self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page,
+            count_limit=ADMIN_EXACT_COUNT_LIMIT,
+            exact=getattr(request, 'exact_count', False),
+        )
+        paginator.expect_page(request.GET.get(PAGE_VAR, 1))
+        return paginator
+
+
+def truncate_text(text):
+    if len(text) > MAX_LENGTH_TEXT:
+        return text[:MAX_LENGTH_TEXT] + '…'
+    return text
+
+
+class PostTextForm(forms.ModelForm):
+    class Meta:
+        model = Post
+        fields = ('text',)
+
+
+def get_post_ids(comments):
+    return list(
+        comments.order_by().values_list('post_id', flat=True).distinct()
+    )
+
+
+def comments_changed(post_ids, create_missing=True):
+    """Обновляет счётчики и страницы публикаций после массового действия.
+
+    Массовые действия меняют комментарии через `update()`, без сигналов.
+    """
+    recount_comments(post_ids, create_missing)
+    queue_purge(*(f'post:{post_id}' for post_id in post_ids))
+
+
+class PrefixAutocompleteMixin:
+    """Автодополнение ищет по началу строки, чтобы запрос шёл по индексу.
+
+    Обычный поиск в списке объектов остаётся на `search_fields`.
+    """
+
+    autocomplete_search_fields = ()
+
+    def get_search_fields(self, request):
+        match = request.resolver_match
+        if match is not None and match.url_name == 'autocomplete':
+            return self.autocomplete_search_fields
+        return super().get_search_fields(request)
+
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = (
         'title',
-        'text',
+        'short_text',
         'pub_date',
         'author',
         'location',
@@ -18,17 +118,102 @@ class PostAdmin(admin.ModelAdmin):
         'created_at',
     )
     list_editable = (
-        'text',
         'category',
         'is_published',
     )
+    list_select_related = ('author', 'location', 'category')
+    autocomplete_fields = ('author', 'location', 'category')
     search_fields = ('title',)
     list_filter = ('category',)
     list_display_links = ('title',)
 
+    def is_changelist(self, request):
+        opts = self.model._meta
+        return request.resolver_match.url_name == (
+            f'{opts.app_label}_{opts.model_name}_changelist'
+        )
+
+    def get_autocomplete_fields(self, request):
+        # В списке публикаций категория выбирается из общего списка.
+        if self.is_changelist(request):
+            return ()
+        return super().get_autocomplete_fields(request)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.is_changelist(request):
+            queryset = queryset.defer('text').annotate(
+                text_preview=Substr('text', 1, MAX_LENGTH_TEXT + 1)
+            )
+        return queryset
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if (
+            formfield is not None
+            and db_field.name in self.list_editable
+            and self.is_changelist(request)
+        ):
+            # Один список вариантов на все строки вместо запроса на каждую.
+            formfield.choices = [
+                (getattr(value, 'value', value), label)
+                for value, label in formfield.choices
+            ]
+        return formfield
+
+    @admin.display(description='Текст')
+    def short_text(self, post):
+        text = getattr(post, 'text_preview', None)
+        if text is None:
+            text = post.text
+        return format_html(
+            '<span class="post-text-preview">{}</span>'
+            '<details class="post-text-editor" data-url="{}">'
+            '<summary>изменить</summary></details>',
+            truncate_text(text),
+            reverse('admin:blog_post_text', args=(post.pk,)),
+        )
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/text/',
+                self.admin_site.admin_view(self.text_view),
+                name='blog_post_text',
+            ),
+            *super().get_urls(),
+        ]
+
+    def text_view(self, request, object_id):
+        """Правка текста публикации прямо из списка.
+
+        Форму с полным текстом список загружает только для строки, которую
+        раскрыли, и отправляет её скриптом (см. post/change_list.html).
+        """
+        post = self.get_object(request, unquote(object_id))
+        if post is None:
+            raise Http404
+        if not self.has_change_permission(request, post):
+            raise PermissionDenied
+        form = PostTextForm(request.POST or None, instance=post)
+        if request.method == 'POST' and form.is_valid():
+            form.save()
+            self.log_change(
+                request, post, self.construct_change_message(
+                    request, form, None
+                )
+            )
+            return JsonResponse({'preview': truncate_text(post.text)})
+        return TemplateResponse(
+            request, 'admin/blog/post/text_form.html', {'form': form},
+            status=400 if form.is_bound else 200,
+        )
+
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = (
         'title',
         'description',
@@ -41,11 +226,12 @@ class CategoryAdmin(admin.ModelAdmin):
         'is_published',
     )
     search_fields = ('title',)
+    autocomplete_search_fields = ('^title',)
     list_display_links = ('title',)
 
 
 @admin.register(Location)
-class LocationAdmin(admin.ModelAdmin):
+class LocationAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = (
         'name',
         'created_at',
@@ -55,14 +241,117 @@ class LocationAdmin(admin.ModelAdmin):
         'is_published',
     )
     search_fields = ('name',)
+    autocomplete_search_fields = ('^name',)
     list_display_links = ('name',)
 
 
+def comment_text_contains(word, vendor):
+    """Условие «слово есть в тексте комментария» для СУБД `vendor`.
+
+    В SQLite слово ищется как начало слова текста в таблице FTS5, в
+    остальных СУБД — через icontains (в PostgreSQL по триграммному
+    индексу).
+    """
+    if vendor != 'sqlite':
+        return Q(text__icontains=word)
+    phrase = '"{}"*'.format(word.replace('"', '""'))
+    return Q(pk__in=RawSQL(
+        'SELECT rowid FROM blog_comment_fts WHERE blog_comment_fts MATCH %s',
+        (phrase,),
+    ))
+
+
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    """Очередь модерации комментариев.
+
+    Массовые действия выполняются одним UPDATE/DELETE на всю выборку.
+    Комментарии одной публикации: фильтр `?post__id__exact=<id>`.
+    """
+
     list_display = (
-        'text',
-        'created_at',
+        'short_text',
+        'post_link',
         'author',
+        'created_at',
+        'is_published',
     )
-    search_fields = ('author',)
+    list_select_related = ('author', 'post')
+    list_filter = ('is_published', 'created_at')
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post',)
+    # Поиск реализован в get_search_results: имя автора — по началу,
+    # текст — по словам в любом месте.
+    search_fields = ('^author__username', 'text')
+    actions = ('hide_comments', 'publish_comments', 'delete_comments')
+
+    @admin.display(description='Комментарий')
+    def short_text(self, comment):
+        return str(comment)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Комментарии, в которых каждое слово запроса найдено в имени
+        автора или в тексте.
+
+        Стандартный поиск строит OR по столбцам двух таблиц через JOIN, и
+        СУБД перебирает все комментарии. Здесь обе части — подзапросы по
+        индексам: по началу имени (миграция 0006) и по полнотекстовому
+        индексу текста (миграция 0015).
+        """
+        vendor = connections[queryset.db].vendor
+        for word in smart_split(search_term):
+            if word[0] in '"\'' and word[-1] == word[0]:
+                word = unescape_string_literal(word)
+            authors = User.objects.filter(
+                username__istartswith=word
+            ).values('pk')
+            queryset = queryset.filter(
+                Q(author__in=authors) | comment_text_contains(word, vendor)
+            )
+        return queryset, False
+
+    @admin.display(description='Публикация', ordering='post')
+    def post_link(self, comment):
+        return format_html(
+            '<a href="?post__id__exact={}">{}</a>',
+            comment.post_id,
+            comment.post,
+        )
+
+    @admin.action(
+        description='Скрыть выбранные комментарии',
+        permissions=('change',),
+    )
+    def hide_comments(self, request, queryset):
+        post_ids = get_post_ids(queryset)
+        updated = queryset.update(is_published=False)
+        comments_changed(post_ids)
+        self.message_user(request, f'Скрыто комментариев: {updated}.')
+
+    @admin.action(
+        description='Опубликовать выбранные комментарии',
+        permissions=('change',),
+    )
+    def publish_comments(self, request, queryset):
+        post_ids = get_post_ids(queryset)
+        updated = queryset.update(is_published=True)
+        comments_changed(post_ids)
+        self.message_user(request, f'Опубликовано комментариев: {updated}.')
+
+    @admin.action(
+        description='Удалить выбранные комментарии без подтверждения',
+        permissions=('delete',),
+    )
+    def delete_comments(self, request, queryset):
+        post_ids = get_post_ids(queryset)
+        deleted, _ = queryset.delete()
+        comments_changed(post_ids, create_missing=False)
+        self.message_user(request, f'Удалено комментариев: {deleted}.')
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class BlogUserAdmin(PrefixAutocompleteMixin, UserAdmin):
+    autocomplete_search_fields = ('^username',)
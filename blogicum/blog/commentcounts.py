@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.constants import COUNTERS_RECONCILE_BATCH
+
+from .models import Comment, Post, PostCommentCount
+
+
+def recount_comments(post_ids, create_missing=True):
+    """Пересчитывает опубликованные комментарии к публикациям одним UPDATE.
+
+    Строки счётчиков появляются с первым комментарием, до этого лента
+    показывает ноль; недостающие строки создаются одним INSERT. При
+    удалении комментариев `create_missing=False`: публикация может
+    удаляться вместе с ними, и новая строка ссылалась бы на неё.
+    """
+    post_ids = list(post_ids)
+    if create_missing:
+        PostCommentCount.objects.bulk_create(
+            [PostCommentCount(post_id=post_id) for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+    published = Comment.objects.filter(
+        post=OuterRef('post_id'), is_published=True
+    ).order_by().values('post').annotate(total=Count('pk')).values('total')
+    PostCommentCount.objects.filter(post_id__in=post_ids).update(
+        count=Coalesce(Subquery(published), Value(0))
+    )
+
+
+def reconcile_comment_counts(batch_size=COUNTERS_RECONCILE_BATCH):
+    """Сверяет счётчики комментариев всех публикаций с таблицей комментариев.
+
+    Исправляет счётчики, разошедшиеся из-за записей в обход сигналов
+    (`update()`, `bulk_create()`, импорт), по `batch_size` публикаций за
+    транзакцию.
+    """
+    last_id = 0
+    while True:
+        post_ids = list(Post.objects.filter(pk__gt=last_id).order_by(
+            'pk'
+        ).values_list('pk', flat=True)[:batch_size])
+        if not post_ids:
+            return
+        with transaction.atomic():
+            recount_comments(post_ids)
+        last_id = post_ids[-1]
@@ -0,0 +1,109 @@
+import threading
+import time
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core.bloom import BloomFilter
+from core.changelog import REBUILD, ChangeLog
+from core.constants import EXISTENCE_ERROR_RATE, EXISTENCE_INDEX_MAX_AGE
+from core.views import not_found
+
+from .models import Post
+
+User = get_user_model()
+
+
+class ExistenceIndex:
+    """Фильтр Блума по значениям одного столбца в памяти процесса.
+
+    Отвечает, может ли запись существовать: «нет» — точно нет, и такой
+    запрос можно сразу завершить ответом 404 без обращения к БД; «да»
+    ошибочно примерно в `EXISTENCE_ERROR_RATE` случаев, и тогда запись
+    ищется в БД как обычно. Удаление записей фильтр не учитывает: лишнее
+    «да» безопасно.
+
+    Новые значения процесс добавляет в свой фильтр сразу, а после
+    фиксации транзакции пишет в журнал изменений в общем кэше (см.
+    core.changelog); остальные процессы при следующей проверке добавляют
+    их в свои фильтры. Кроме того, фильтр перестраивается раз в
+    `EXISTENCE_INDEX_MAX_AGE` секунд, чтобы подхватить записи, созданные
+    в обход сигналов.
+    """
+
+    def __init__(self, name, load, max_age=EXISTENCE_INDEX_MAX_AGE):
+        self.load = load
+        self.max_age = max_age
+        self.log = ChangeLog(f'blog:exists:{name}')
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._applied = None
+        self._built_at = 0
+
+    def _is_fresh(self):
+        return (
+            self._bloom is not None
+            and time.monotonic() - self._built_at < self.max_age
+        )
+
+    def _get_bloom(self):
+        last = self.log.last()
+        if self._is_fresh() and last == self._applied:
+            return self._bloom
+        with self._lock:
+            if not self._is_fresh():
+                self._rebuild(last)
+            elif last != self._applied:
+                values = self.log.read(self._applied, last)
+                if values is None:
+                    self._rebuild(last)
+                else:
+                    for value in values:
+                        self._bloom.add(value)
+                    self._applied = last
+            return self._bloom
+
+    def _rebuild(self, last):
+        # Номер журнала запоминается до чтения БД: значения, добавленные
+        # во время построения, будут дочитаны из журнала ещё раз.
+        self._bloom = BloomFilter.from_values(
+            self.load(), EXISTENCE_ERROR_RATE
+        )
+        self._applied = last
+        self._built_at = time.monotonic()
+
+    def might_exist(self, value):
+        return value in self._get_bloom()
+
+    def add(self, value):
+        bloom = self._bloom
+        if bloom is not None:
+            bloom.add(value)
+        transaction.on_commit(lambda: self.log.publish(value))
+
+    def invalidate(self):
+        """Перестраивает фильтр во всех процессах."""
+        self._bloom = None
+        self.log.publish(REBUILD)
+
+
+post_ids = ExistenceIndex(
+    'post', lambda: Post.objects.values_list('pk', flat=True).iterator()
+)
+usernames = ExistenceIndex(
+    'username',
+    lambda: User.objects.values_list('username', flat=True).iterator(),
+)
+
+
+def require_existing(index, kwarg):
+    """Отвечает 404 без запросов к БД, если записи из URL точно нет."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not index.might_exist(kwargs[kwarg]):
+                return not_found(request)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
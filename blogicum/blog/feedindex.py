@@ -0,0 +1,374 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.changelog import REBUILD, ChangeLog
+
+from .lookups import categories
+from .models import Post
+from .updates import from_micros, to_micros
+
+
+class FeedScope:
+    """Публикации одной ленты, отсортированные по (pub_date, id).
+
+    Даты хранятся в микросекундах в параллельных массивах `array('q')`:
+    восемь байт на дату и восемь на id.
+    """
+
+    __slots__ = ('keys', 'ids')
+
+    def __init__(self):
+        self.keys = array('q')
+        self.ids = array('q')
+
+    def _position(self, key, pk):
+        position = bisect_left(self.keys, key)
+        while (position < len(self.keys) and self.keys[position] == key
+               and self.ids[position] < pk):
+            position += 1
+        return position
+
+    def append(self, key, pk):
+        self.keys.append(key)
+        self.ids.append(pk)
+
+    def insert(self, key, pk):
+        position = self._position(key, pk)
+        self.keys.insert(position, key)
+        self.ids.insert(position, pk)
+
+    def remove(self, key, pk):
+        position = self._position(key, pk)
+        if position < len(self.ids) and self.ids[position] == pk:
+            del self.keys[position]
+            del self.ids[position]
+
+    def visible_count(self, now_key):
+        """Сколько публикаций уже вышло к моменту `now_key`."""
+        return bisect_right(self.keys, now_key)
+
+    def next_key(self, now_key):
+        """Дата ближайшей отложенной публикации или None."""
+        position = bisect_right(self.keys, now_key)
+        return self.keys[position] if position < len(self.keys) else None
+
+    def page_ids(self, now_key, start, stop):
+        """Id публикаций с `start` по `stop` от новых к старым."""
+        visible = self.visible_count(now_key)
+        ids = self.ids[max(visible - stop, 0):max(visible - start, 0)]
+        ids.reverse()
+        return ids.tolist()
+
+
+EMPTY_SCOPE = FeedScope()
+
+
+class FeedEntries:
+    """Дата, категория и автор публикаций индекса, отсортированные по id.
+
+    Параллельные массивы `array('q')`: 32 байта на публикацию. По ним
+    индекс находит, из каких лент убрать изменившуюся публикацию.
+    """
+
+    __slots__ = ('ids', 'keys', 'categories', 'authors')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.keys = array('q')
+        self.categories = array('q')
+        self.authors = array('q')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _arrays(self):
+        return (self.ids, self.keys, self.categories, self.authors)
+
+    def _find(self, pk):
+        position = bisect_left(self.ids, pk)
+        found = position < len(self.ids) and self.ids[position] == pk
+        return position, found
+
+    def get(self, pk):
+        position, found = self._find(pk)
+        if not found:
+            return None
+        return (
+            self.keys[position],
+            self.categories[position],
+            self.authors[position],
+        )
+
+    def append(self, pk, entry):
+        """Добавляет публикацию в конец; после всех добавлений — `sort()`."""
+        for values, value in zip(self._arrays(), (pk, *entry)):
+            values.append(value)
+
+    def sort(self):
+        order = sorted(range(len(self.ids)), key=self.ids.__getitem__)
+        for name, values in zip(self.__slots__, self._arrays()):
+            setattr(self, name, array('q', (values[i] for i in order)))
+
+    def set(self, pk, entry):
+        position, found = self._find(pk)
+        for values, value in zip(self._arrays(), (pk, *entry)):
+            if found:
+                values[position] = value
+            else:
+                values.insert(position, value)
+
+    def pop(self, pk):
+        entry = self.get(pk)
+        if entry is not None:
+            position, _ = self._find(pk)
+            for values in self._arrays():
+                del values[position]
+        return entry
+
+    def items(self):
+        for pk, *entry in zip(*self._arrays()):
+            yield pk, tuple(entry)
+
+
+class FeedIndex:
+    """Ленты видимых публикаций: общая, по категориям и по авторам.
+
+    В индекс попадают и отложенные публикации: они становятся видимыми,
+    когда наступает их `pub_date`, без перестройки индекса.
+    """
+
+    def __init__(self):
+        self.scopes = {}
+        self.entries = FeedEntries()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        rows = Post.objects.filter(
+            is_published=True,
+            category_id__in=categories.published_ids(),
+        ).order_by('pub_date', 'id').values_list(
+            'id', 'pub_date', 'category_id', 'author_id'
+        )
+        for pk, pub_date, category_id, author_id in rows.iterator():
+            entry = (to_micros(pub_date), category_id, author_id)
+            index.entries.append(pk, entry)
+            for scope in index._scope_names(entry):
+                index._scope(scope).append(entry[0], pk)
+        index.entries.sort()
+        return index
+
+    @staticmethod
+    def _scope_names(entry):
+        _, category_id, author_id = entry
+        return (None, ('category', category_id), ('author', author_id))
+
+    def _scope(self, name):
+        scope = self.scopes.get(name)
+        if scope is None:
+            scope = self.scopes[name] = FeedScope()
+        return scope
+
+    def add(self, pk, entry):
+        with self.lock:
+            self._discard(pk)
+            self.entries.set(pk, entry)
+            for name in self._scope_names(entry):
+                self._scope(name).insert(entry[0], pk)
+
+    def discard(self, pk):
+        with self.lock:
+            self._discard(pk)
+
+    def _discard(self, pk):
+        entry = self.entries.pop(pk)
+        if entry is not None:
+            for name in self._scope_names(entry):
+                self._scope(name).remove(entry[0], pk)
+
+    def changes_to(self, other):
+        """Изменения `(pk, entry или None)`, превращающие индекс в `other`."""
+        with self.lock:
+            old, new = self.entries.items(), other.entries.items()
+            old_item, new_item = next(old, None), next(new, None)
+            changes = []
+            while old_item is not None or new_item is not None:
+                if new_item is None or (
+                    old_item is not None and old_item[0] < new_item[0]
+                ):
+                    changes.append((old_item[0], None))
+                    old_item = next(old, None)
+                elif old_item is None or new_item[0] < old_item[0]:
+                    changes.append(new_item)
+                    new_item = next(new, None)
+                else:
+                    if old_item != new_item:
+                        changes.append(new_item)
+                    old_item, new_item = next(old, None), next(new, None)
+            return changes
+
+    def count(self, name, now_key):
+        with self.lock:
+            return self.scopes.get(name, EMPTY_SCOPE).visible_count(now_key)
+
+    def next_key(self, name, now_key):
+        with self.lock:
+            return self.scopes.get(name, EMPTY_SCOPE).next_key(now_key)
+
+    def page_ids(self, name, now_key, start, stop):
+        with self.lock:
+            return self.scopes.get(name, EMPTY_SCOPE).page_ids(
+                now_key, start, stop
+            )
+
+
+class IndexedFeed:
+    """Лента для пагинатора: id берутся из индекса, строки — по id.
+
+    Срез читает из БД только публикации запрошенной страницы по
+    первичному ключу; число публикаций считается по индексу.
+    """
+
+    model = Post
+
+    def __init__(self, index, scope):
+        self.index = index
+        self.scope = scope
+        self.now_key = to_micros(timezone.now())
+
+    def __len__(self):
+        return self.index.count(self.scope, self.now_key)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('Ленту можно только срезать без шага.')
+        start, stop, _ = item.indices(len(self))
+        ids = self.index.page_ids(self.scope, self.now_key, start, stop)
+        if not ids:
+            return []
+        posts = Post.objects.published().filter(
+            pk__in=ids
+        ).with_comment_count().for_feed().in_bulk()
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class FeedIndexCache:
+    """Индекс лент в памяти процесса.
+
+    Изменения публикаций после фиксации транзакции применяются к индексу
+    этого процесса и пишутся в журнал изменений в общем кэше (см.
+    core.changelog). Другие процессы при следующем обращении применяют к
+    своим индексам только эти изменения. Целиком индекс строится при
+    первом обращении, после `invalidate()` и если процесс отстал от
+    журнала. Изменения в обход сигналов исправляет периодическая задача
+    `blog.reconcile_feed_index` (см. `reconcile`).
+    """
+
+    def __init__(self):
+        self.log = ChangeLog('blog:feed-index')
+        self._lock = threading.Lock()
+        self._index = None
+        self._applied = None
+
+    def get(self):
+        index = self._index
+        if index is not None and self.log.last() == self._applied:
+            return index
+        with self._lock:
+            last = self.log.last()
+            if self._index is None:
+                self._rebuild(last)
+            elif last != self._applied:
+                changes = self.log.read(self._applied, last)
+                if changes is None:
+                    self._rebuild(last)
+                else:
+                    for pk, entry in changes:
+                        self._apply(self._index, pk, entry)
+                    self._applied = last
+            return self._index
+
+    def _rebuild(self, last):
+        # Номер журнала запоминается до чтения БД: изменения, сделанные
+        # во время построения, будут применены из журнала ещё раз.
+        self._index = FeedIndex.build()
+        self._applied = last
+
+    @staticmethod
+    def _apply(index, pk, entry):
+        if entry is None:
+            index.discard(pk)
+        else:
+            index.add(pk, entry)
+
+    def _publish(self, pk, entry):
+        number = self.log.publish((pk, entry))
+        with self._lock:
+            if self._index is not None:
+                self._apply(self._index, pk, entry)
+                if number == self._applied + 1:
+                    self._applied = number
+
+    def _changed(self, pk, entry):
+        """Применяет изменение ко всем индексам после фиксации транзакции.
+
+        Откатившееся сохранение не оставляет в индексе лишней записи.
+        """
+        transaction.on_commit(lambda: self._publish(pk, entry))
+
+    def reconcile(self):
+        """Сверяет индекс с БД и публикует расхождения как изменения.
+
+        Процессы применяют их так же, как изменения из сигналов, и не
+        перестраивают индекс во время запросов. Публикации, изменённые
+        по журналу во время чтения БД, пропускаются: журнал новее.
+        """
+        start = self.log.last()
+        fresh = FeedIndex.build()
+        index = self.get()
+        changed = self.log.read(start, self._applied)
+        if changed is None:
+            return
+        touched = {pk for pk, _ in changed}
+        for pk, entry in index.changes_to(fresh):
+            if pk not in touched:
+                self._publish(pk, entry)
+
+    def post_saved(self, post):
+        entry = None
+        if (post.is_published
+                and post.category_id in categories.published_ids()):
+            entry = (
+                to_micros(post.pub_date), post.category_id, post.author_id
+            )
+        self._changed(post.pk, entry)
+
+    def post_deleted(self, pk):
+        self._changed(pk, None)
+
+    def invalidate(self):
+        """Перестраивает индекс во всех процессах."""
+        self._index = None
+        self.log.publish(REBUILD)
+
+    def next_pub_date(self):
+        """Когда выйдет ближайшая отложенная публикация (None — нет таких)."""
+        key = self.get().next_key(None, to_micros(timezone.now()))
+        return None if key is None else from_micros(key)
+
+    def feed(self, category_id=None, author_id=None):
+        if category_id is not None:
+            scope = ('category', category_id)
+        elif author_id is not None:
+            scope = ('author', author_id)
+        else:
+            scope = None
+        return IndexedFeed(self.get(), scope)
+
+
+feed_index = FeedIndexCache()
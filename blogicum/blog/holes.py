@@ -0,0 +1,52 @@
+from django.template.loader import render_to_string
+from django.utils.html import escape
+
+from core.holes import register_hole
+
+from .forms import CommentForm
+from .viewcounts import get_view_count
+
+
+@register_hole('user_menu')
+def user_menu(request):
+    return render_to_string('includes/user_menu.html', request=request)
+
+
+@register_hole('request_uri')
+def request_uri(request):
+    return escape(request.build_absolute_uri())
+
+
+@register_hole('post_views')
+def post_views(request, post_id):
+    return str(get_view_count(post_id))
+
+
+@register_hole('comment_form')
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    return render_to_string(
+        'includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()},
+        request=request,
+    )
+
+
+@register_hole('post_controls')
+def post_controls(request, post_id, author_id):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'includes/post_controls.html', {'post_id': post_id}
+    )
+
+
+@register_hole('comment_controls')
+def comment_controls(request, post_id, comment_id, author_id):
+    if request.user.pk != author_id:
+        return ''
+    return render_to_string(
+        'includes/comment_controls.html',
+        {'post_id': post_id, 'comment_id': comment_id},
+    )
@@ -0,0 +1,240 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.constants import (IMPORT_BATCH_SIZE, IMPORT_IMAGE_TIMEOUT,
+                            MAX_LENGTH, MAX_LENGTH_FOR_POST_TEXT)
+from jobs.queue import enqueue
+
+from .existence import post_ids
+from .feedindex import feed_index
+from .models import Category, Location, Post
+from .surrogate import FEED_KEY, queue_purge
+from .updates import reset_high_water_mark
+
+User = get_user_model()
+
+
+class RecordError(ValueError):
+    """Ошибка в записи импортируемой публикации."""
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    errors: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Публикаций в секунду."""
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+
+class NaturalKeyMap:
+    """Соответствие естественного ключа и id, дозагружаемое пачками."""
+
+    def __init__(self, queryset, key_field):
+        self.queryset = queryset
+        self.key_field = key_field
+        self.ids: Dict[str, Optional[int]] = {}
+
+    def load(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if not missing:
+            return
+        for key in missing:
+            self.ids[key] = None
+        found = self.queryset.filter(
+            **{f'{self.key_field}__in': missing}
+        ).values_list(self.key_field, 'id')
+        for key, pk in found:
+            # Названия местоположений не уникальны: берётся первое.
+            if self.ids[key] is None:
+                self.ids[key] = pk
+
+    def resolve(self, key, label):
+        if not key:
+            return None
+        pk = self.ids.get(key)
+        if pk is None:
+            raise RecordError(f'{label} «{key}» не найден(а).')
+        return pk
+
+
+class PostImporter:
+    """Массовый импорт публикаций из NDJSON.
+
+    Каждая строка — объект с полями `title`, `text`, `pub_date`,
+    `author` (username), `category` (slug), `location` (название),
+    необязательными `is_published` и `image` (URL или путь в хранилище).
+    Связи разрешаются по естественным ключам через словари в памяти,
+    публикации сохраняются `bulk_create` пачками, каждая — в своей
+    транзакции. Картинки по URL скачиваются в пуле потоков, миниатюры к
+    фото делает очередь задач. После импорта прокси очищается от лент,
+    в которые попали новые публикации.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, fetch_images=False,
+                 workers=8):
+        self.batch_size = batch_size
+        self.fetch_images = fetch_images
+        self.workers = workers
+        self.users = NaturalKeyMap(User.objects.all(), 'username')
+        self.categories = NaturalKeyMap(Category.objects.all(), 'slug')
+        self.locations = NaturalKeyMap(Location.objects.all(), 'name')
+        self.purge_keys = set()
+
+    def run(self, lines: Iterable[str], progress=None) -> ImportReport:
+        report = ImportReport()
+        started = time.monotonic()
+        batch = []
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                report.errors.append(f'Строка {number}: {error}')
+                continue
+            if not isinstance(record, dict):
+                report.errors.append(f'Строка {number}: ожидался объект.')
+                continue
+            batch.append((number, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch, report)
+                batch = []
+                report.elapsed = time.monotonic() - started
+                if progress:
+                    progress(report)
+        if batch:
+            self.import_batch(batch, report)
+        if report.created:
+            # bulk_create не отправляет сигналы — сбрасываем кэши сами.
+            feed_index.invalidate()
+            post_ids.invalidate()
+            reset_high_water_mark()
+            queue_purge(FEED_KEY, *self.purge_keys)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def import_batch(self, batch, report):
+        records = [record for _, record in batch]
+        self.users.load(record.get('author') for record in records)
+        self.categories.load(record.get('category') for record in records)
+        self.locations.load(record.get('location') for record in records)
+        posts, keys = [], set()
+        for number, record in batch:
+            try:
+                posts.append(self.build_post(record))
+            except KeyError as error:
+                report.errors.append(f'Строка {number}: нет поля {error}.')
+            except (RecordError, TypeError) as error:
+                report.errors.append(f'Строка {number}: {error}')
+            else:
+                keys.add(f'author:{posts[-1].author_id}')
+                if record.get('category'):
+                    keys.add(f'category:{record["category"]}')
+        if self.fetch_images:
+            self.attach_images(posts, report)
+        with transaction.atomic():
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+            self.schedule_thumbnails(posts)
+        report.created += len(posts)
+        self.purge_keys.update(keys)
+
+    def build_post(self, record) -> Post:
+        title, text = record['title'], record['text']
+        if not title or len(title) > MAX_LENGTH:
+            raise RecordError('пустой или слишком длинный заголовок.')
+        if len(text) > MAX_LENGTH_FOR_POST_TEXT:
+            raise RecordError('слишком длинный текст.')
+        pub_date = parse_datetime(record['pub_date'])
+        if pub_date is None:
+            raise RecordError(f'неверная дата «{record["pub_date"]}».')
+        if timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        author_id = self.users.resolve(record['author'], 'Пользователь')
+        if author_id is None:
+            raise RecordError('не указан автор.')
+        post = Post(
+            title=title,
+            text=text,
+            pub_date=pub_date,
+            author_id=author_id,
+            category_id=self.categories.resolve(
+                record.get('category'), 'Категория'
+            ),
+            location_id=self.locations.resolve(
+                record.get('location'), 'Местоположение'
+            ),
+            is_published=record.get('is_published', True),
+            image=record.get('image', ''),
+        )
+        # bulk_create не вызывает save(), поэтому выдержку считаем здесь.
+        post.fill_computed_fields()
+        return post
+
+    def attach_images(self, posts, report):
+        remote = [post for post in posts
+                  if urlparse(post.image.name).scheme in ('http', 'https')]
+        if not remote:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(self.fetch_image,
+                                   [post.image.name for post in remote])
+            for post, (name, error) in zip(remote, results):
+                if error:
+                    report.errors.append(f'{post.title}: {error}')
+                post.image = name
+
+    @staticmethod
+    def schedule_thumbnails(posts):
+        """Ставит в очередь миниатюры фото созданных публикаций.
+
+        bulk_create не отправляет post_save, и сигнал schedule_thumbnail
+        их не ставит. id созданных публикаций SQLite не возвращает,
+        поэтому они находятся по именам фото.
+        """
+        images = {post.image.name for post in posts if post.image}
+        if not images:
+            return
+        created = Post.objects.filter(
+            image__in=images, thumbnail=''
+        ).values_list('pk', 'image')
+        for pk, image in created.iterator():
+            enqueue('blog.make_post_thumbnail', {
+                'post_id': pk,
+                'image': image,
+            })
+
+    @staticmethod
+    def fetch_image(url):
+        try:
+            with urlopen(url, timeout=IMPORT_IMAGE_TIMEOUT) as response:
+                content = response.read()
+        except OSError as error:
+            return '', f'картинка {url} не загружена ({error}).'
+        filename = os.path.basename(urlparse(url).path) or 'image.jpg'
+        name = default_storage.save(
+            f'posts_images/{filename}', ContentFile(content)
+        )
+        return name, None
+
+
+def import_posts(lines, **options) -> ImportReport:
+    """Импортирует публикации из строк NDJSON."""
+    return PostImporter(**options).run(lines)
@@ -0,0 +1,74 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from core.constants import (COUNTERS_RECONCILE_INTERVAL,
+                            FEED_INDEX_RECONCILE_INTERVAL, THUMBNAIL_SIZE)
+from core.surrogate import purge_surrogate_keys
+from jobs.queue import job
+
+from .commentcounts import reconcile_comment_counts
+from .feedindex import feed_index
+from .models import Post
+from .notifications import send_comment_digests
+from .viewcounts import refresh_view_counts
+
+
+@job('blog.make_post_thumbnail')
+def make_post_thumbnail(payload):
+    """Создаёт миниатюру фото публикации для карточек ленты."""
+    post = Post.objects.only('id', 'image', 'thumbnail').filter(
+        pk=payload['post_id']
+    ).first()
+    if post is None or post.image.name != payload['image']:
+        # Публикация удалена или фото уже заменено: им займётся новая задача.
+        return
+    with post.image.open('rb') as source:
+        image = Image.open(source)
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    old_thumbnail = post.thumbnail.name
+    post.thumbnail.save(f'{stem}.jpg', ContentFile(buffer.getvalue()),
+                        save=False)
+    updated = Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnail=post.thumbnail.name
+    )
+    stale = old_thumbnail if updated else post.thumbnail.name
+    if stale:
+        post.thumbnail.storage.delete(stale)
+
+
+@job('blog.send_comment_digest', batch=True)
+def send_comment_digest(payloads):
+    send_comment_digests(payloads)
+
+
+@job('blog.purge_surrogate_keys', batch=True)
+def purge_proxy_cache(payloads):
+    """Очищает страницы прокси по ключам всех взятых задач разом."""
+    purge_surrogate_keys(
+        key for payload in payloads for key in payload['keys']
+    )
+
+
+@job('blog.reconcile_counters', max_attempts=1,
+     every=COUNTERS_RECONCILE_INTERVAL)
+def reconcile_counters(payload):
+    """Сверяет счётчики публикаций с БД вне обработки запросов."""
+    reconcile_comment_counts()
+    refresh_view_counts()
+
+
+@job('blog.reconcile_feed_index', max_attempts=1,
+     every=FEED_INDEX_RECONCILE_INTERVAL)
+def reconcile_feed_index(payload):
+    """Исправляет индекс лент во всех процессах вне обработки запросов."""
+    if settings.FEED_INDEX_ENABLED:
+        feed_index.reconcile()
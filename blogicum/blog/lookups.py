@@ -0,0 +1,97 @@
+import threading
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category, Location
+
+
+class LookupTable:
+    """Кэш небольшой справочной таблицы в памяти процесса.
+
+    Таблица целиком загружается в словари по `id` и по полям из
+    `key_fields`. Актуальность проверяется по версии в общем кэше: при
+    изменении записи версия меняется, и каждый процесс перечитывает
+    таблицу при следующем обращении. Если версия пропала из кэша,
+    таблица тоже перечитывается.
+    """
+
+    def __init__(self, model, key_fields=()):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        self.version_key = f'blog:lookup:{model._meta.label_lower}:version'
+        self._lock = threading.Lock()
+        self._version = None
+        self._maps = None
+
+    def _current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def _load(self):
+        objects = list(self.model.objects.all())
+        maps = {'id': {obj.pk: obj for obj in objects}}
+        for field in self.key_fields:
+            maps[field] = {getattr(obj, field): obj for obj in objects}
+        return maps
+
+    def _get_maps(self):
+        version = self._current_version()
+        maps = self._maps
+        if maps is None or version != self._version:
+            with self._lock:
+                if self._maps is None or version != self._version:
+                    self._maps = self._load()
+                    self._version = version
+                maps = self._maps
+        return maps
+
+    def get(self, pk):
+        return self._get_maps()['id'].get(pk)
+
+    def get_by(self, field, value):
+        return self._get_maps()[field].get(value)
+
+    def published_ids(self):
+        return [
+            obj.pk for obj in self._get_maps()['id'].values()
+            if obj.is_published
+        ]
+
+    def invalidate(self):
+        self._maps = None
+        cache.set(self.version_key, uuid4().hex, None)
+
+    def invalidate_on_commit(self):
+        """Сбрасывает кэш сразу и ещё раз после фиксации транзакции.
+
+        Второй сброс нужен, чтобы другой процесс не успел закэшировать
+        данные, прочитанные до фиксации.
+        """
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
+
+categories = LookupTable(Category, key_fields=('slug',))
+locations = LookupTable(Location)
+
+
+def attach_lookups(posts):
+    """Подставляет публикациям категорию и местоположение из кэша.
+
+    Возвращает список публикаций; запросы к таблицам категорий и
+    местоположений при этом не выполняются.
+    """
+    posts = list(posts)
+    for post in posts:
+        for field, table in (('category', categories),
+                             ('location', locations)):
+            pk = getattr(post, f'{field}_id')
+            obj = table.get(pk) if pk is not None else None
+            if obj is not None:
+                setattr(post, field, obj)
+    return posts
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает вычисляемые поля публикаций и комментариев (выдержку '
+        'и HTML текста) порциями по возрастанию id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько записей обрабатывать за один запрос.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        for model in (Post, Comment):
+            total, updated = self.backfill(model, batch_size)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: проверено {total},'
+                f' обновлено {updated}.'
+            )
+
+    def backfill(self, model, batch_size):
+        fields = model.COMPUTED_FIELDS
+        last_id = 0
+        total = updated = 0
+        while True:
+            objects = list(
+                model.objects.filter(id__gt=last_id).order_by('id').only(
+                    'id', 'text', *fields
+                )[:batch_size]
+            )
+            if not objects:
+                break
+            changed = []
+            for obj in objects:
+                old = [getattr(obj, field) for field in fields]
+                obj.fill_computed_fields()
+                if old != [getattr(obj, field) for field in fields]:
+                    changed.append(obj)
+            model.objects.bulk_update(changed, fields)
+            total += len(objects)
+            updated += len(changed)
+            last_id = objects[-1].id
+        return total, updated
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.importer import PostImporter
+from core.constants import IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует публикации из NDJSON-файла (или stdin, если указан '
+        '«-»). Автор, категория и местоположение задаются username, slug '
+        'и названием.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к NDJSON-файлу или «-».')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help='Публикаций в одной транзакции.',
+        )
+        parser.add_argument(
+            '--fetch-images', action='store_true',
+            help='Скачивать картинки, заданные URL.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоков для загрузки картинок.',
+        )
+
+    def handle(self, *args, path, batch_size, fetch_images, workers,
+               **options):
+        importer = PostImporter(
+            batch_size=batch_size, fetch_images=fetch_images,
+            workers=workers,
+        )
+        if path == '-':
+            report = importer.run(sys.stdin, progress=self.show_progress)
+        else:
+            try:
+                with open(path, encoding='utf-8') as source:
+                    report = importer.run(source, progress=self.show_progress)
+            except OSError as error:
+                raise CommandError(error)
+        for error in report.errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            f'Импортировано публикаций: {report.created} за '
+            f'{report.elapsed:.1f} с ({report.rate:.0f} в секунду), '
+            f'ошибок: {len(report.errors)}.'
+        )
+
+    def show_progress(self, report):
+        self.stdout.write(
+            f'… {report.created} публикаций, {report.rate:.0f} в секунду'
+        )
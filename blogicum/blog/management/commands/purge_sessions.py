@@ -0,0 +1,40 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет просроченные сессии небольшими порциями, чтобы не держать '
+        'блокировку записи SQLite надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько сессий удалять одним запросом.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между порциями, в секундах.',
+        )
+
+    def handle(self, *args, batch_size, pause, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            keys = list(
+                Session.objects.filter(expire_date__lt=now).values_list(
+                    'session_key', flat=True
+                )[:batch_size]
+            )
+            if not keys:
+                break
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            if len(keys) < batch_size:
+                break
+            time.sleep(pause)
+        self.stdout.write(f'Удалено просроченных сессий: {total}.')
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import migrations
+
+# Индексы под поиск по началу строки (istartswith) в автодополнении админки:
+# SQLite использует для LIKE 'abc%' только индекс с COLLATE NOCASE,
+# PostgreSQL — индекс по UPPER(...) с text_pattern_ops.
+PREFIX_INDEXES = (
+    ('blog', 'Category', 'title'),
+    ('blog', 'Location', 'name'),
+    tuple(settings.AUTH_USER_MODEL.split('.')) + ('username',),
+)
+
+CREATE_SQL = {
+    'sqlite': 'CREATE INDEX IF NOT EXISTS "{index}" '
+              'ON "{table}" ("{column}" COLLATE NOCASE)',
+    'postgresql': 'CREATE INDEX IF NOT EXISTS "{index}" '
+                  'ON "{table}" (UPPER("{column}"::text) text_pattern_ops)',
+}
+
+
+def index_names(apps):
+    for app_label, model_name, field_name in PREFIX_INDEXES:
+        model = apps.get_model(app_label, model_name)
+        table = model._meta.db_table
+        column = model._meta.get_field(field_name).column
+        yield f'{table}_{column}_prefix_idx', table, column
+
+
+def create_indexes(apps, schema_editor):
+    sql = CREATE_SQL.get(schema_editor.connection.vendor)
+    if sql is None:
+        return
+    for index, table, column in index_names(apps):
+        schema_editor.execute(
+            sql.format(index=index, table=table, column=column)
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in CREATE_SQL:
+        return
+    for index, _, _ in index_names(apps):
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0005_auto_20240417_2311'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
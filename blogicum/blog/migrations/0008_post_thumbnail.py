@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_comment_moderation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail',
+            field=models.FileField(blank=True, default='', editable=False, help_text='Создаётся фоновой задачей по полю «Фото».', upload_to='posts_images/thumbs', verbose_name='Миниатюра'),
+        ),
+    ]
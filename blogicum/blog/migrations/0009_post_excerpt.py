@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Начало текста для карточки в ленте; заполняется при сохранении.', max_length=256, verbose_name='Выдержка'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:15
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=core.fields.RenderedHTMLField(blank=True, default='', editable=False, help_text='Строится из текста при сохранении.', verbose_name='Комментарий в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=core.fields.RenderedHTMLField(blank=True, default='', editable=False, help_text='Строится из текста при сохранении.', verbose_name='Текст в HTML'),
+        ),
+    ]
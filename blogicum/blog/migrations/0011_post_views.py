@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_rendered_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViews',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='views', serialize=False, to='blog.post')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Просмотры')),
+            ],
+            options={
+                'verbose_name': 'просмотры публикации',
+                'verbose_name_plural': 'Просмотры публикаций',
+            },
+        ),
+    ]
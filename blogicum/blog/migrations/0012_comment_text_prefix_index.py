@@ -0,0 +1,35 @@
+from importlib import import_module
+
+from django.db import migrations
+
+# Поиск комментариев в админке идёт по началу текста (istartswith):
+# индекс строится так же, как в 0006_prefix_search_indexes.
+prefix_indexes = import_module('blog.migrations.0006_prefix_search_indexes')
+
+INDEX = 'blog_comment_text_prefix_idx'
+
+
+def create_index(apps, schema_editor):
+    sql = prefix_indexes.CREATE_SQL.get(schema_editor.connection.vendor)
+    if sql is None:
+        return
+    schema_editor.execute(
+        sql.format(index=INDEX, table='blog_comment', column='text')
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in prefix_indexes.CREATE_SQL:
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_views'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
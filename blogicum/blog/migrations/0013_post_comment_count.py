@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:50
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_comment_counts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    PostCommentCount = apps.get_model('blog', 'PostCommentCount')
+    counts = dict(
+        Comment.objects.filter(is_published=True).order_by().values(
+            'post_id'
+        ).annotate(total=Count('pk')).values_list('post_id', 'total')
+    )
+    PostCommentCount.objects.bulk_create(
+        [
+            PostCommentCount(post_id=post_id, count=counts.get(post_id, 0))
+            for post_id in Post.objects.values_list('pk', flat=True).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_comment_text_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCommentCount',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='comment_total', serialize=False, to='blog.post')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Комментарии')),
+            ],
+            options={
+                'verbose_name': 'число комментариев публикации',
+                'verbose_name_plural': 'Числа комментариев публикаций',
+            },
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
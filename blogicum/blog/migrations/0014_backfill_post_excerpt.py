@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.utils.text import Truncator
+
+from core.constants import EXCERPT_WORDS, MAX_LENGTH
+
+BATCH_SIZE = 500
+
+
+def fill_excerpts(apps, schema_editor):
+    """Заполняет выдержку публикаций, созданных до 0009_post_excerpt.
+
+    Повторяет Post.fill_computed_fields: в миграции методов модели нет.
+    """
+    Post = apps.get_model('blog', 'Post')
+    last_id = 0
+    while True:
+        posts = list(
+            Post.objects.filter(id__gt=last_id, excerpt='').exclude(
+                text=''
+            ).order_by('id').only('id', 'text')[:BATCH_SIZE]
+        )
+        if not posts:
+            return
+        for post in posts:
+            excerpt = Truncator(post.text).words(EXCERPT_WORDS, truncate=' …')
+            post.excerpt = Truncator(excerpt).chars(MAX_LENGTH)
+        Post.objects.bulk_update(posts, ('excerpt',))
+        last_id = posts[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
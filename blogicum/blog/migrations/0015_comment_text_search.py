@@ -0,0 +1,81 @@
+from importlib import import_module
+
+from django.db import migrations
+
+# Поиск по тексту комментариев в админке ищет слова в любом месте текста.
+# Индекс по началу строки из 0012 для этого не годится: SQLite получает
+# полнотекстовый индекс FTS5, PostgreSQL — триграммный индекс pg_trgm
+# под icontains.
+text_prefix_index = import_module(
+    'blog.migrations.0012_comment_text_prefix_index'
+)
+
+FORWARD_SQL = {
+    'sqlite': [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "blog_comment_fts" USING fts5('
+        'text, content="blog_comment", content_rowid="id", '
+        'tokenize="unicode61 remove_diacritics 2")',
+        'CREATE TRIGGER IF NOT EXISTS "blog_comment_fts_insert" '
+        'AFTER INSERT ON "blog_comment" BEGIN '
+        'INSERT INTO "blog_comment_fts" (rowid, text) '
+        'VALUES (new.id, new.text); END',
+        'CREATE TRIGGER IF NOT EXISTS "blog_comment_fts_delete" '
+        'AFTER DELETE ON "blog_comment" BEGIN '
+        'INSERT INTO "blog_comment_fts" ("blog_comment_fts", rowid, text) '
+        'VALUES (\'delete\', old.id, old.text); END',
+        'CREATE TRIGGER IF NOT EXISTS "blog_comment_fts_update" '
+        'AFTER UPDATE OF text ON "blog_comment" BEGIN '
+        'INSERT INTO "blog_comment_fts" ("blog_comment_fts", rowid, text) '
+        'VALUES (\'delete\', old.id, old.text); '
+        'INSERT INTO "blog_comment_fts" (rowid, text) '
+        'VALUES (new.id, new.text); END',
+        'INSERT INTO "blog_comment_fts" ("blog_comment_fts") '
+        'VALUES (\'rebuild\')',
+    ],
+    'postgresql': [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE INDEX IF NOT EXISTS "blog_comment_text_trgm_idx" '
+        'ON "blog_comment" USING gin (UPPER("text"::text) gin_trgm_ops)',
+    ],
+}
+
+BACKWARD_SQL = {
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS "blog_comment_fts_insert"',
+        'DROP TRIGGER IF EXISTS "blog_comment_fts_delete"',
+        'DROP TRIGGER IF EXISTS "blog_comment_fts_update"',
+        'DROP TABLE IF EXISTS "blog_comment_fts"',
+    ],
+    'postgresql': [
+        'DROP INDEX IF EXISTS "blog_comment_text_trgm_idx"',
+    ],
+}
+
+
+def create_search_index(apps, schema_editor):
+    statements = FORWARD_SQL.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    text_prefix_index.drop_index(apps, schema_editor)
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = BACKWARD_SQL.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+    text_prefix_index.create_index(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_backfill_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
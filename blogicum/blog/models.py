@@ -1,10 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.query import ModelIterable
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
 
-from core.constants import (MAX_LENGTH, MAX_LENGTH_FOR_COMMENT,
+from core.constants import (EXCERPT_WORDS, MAX_LENGTH, MAX_LENGTH_FOR_COMMENT,
                             MAX_LENGTH_FOR_POST_TEXT, MAX_LENGTH_TEXT)
+from core.fields import RenderedHTMLField
+from core.markup import render_markup
 from core.models import BlogModel
+from core.querycache import CachedQuerySet, CachedQuerySetMixin
 
 User = get_user_model()
 
@@ -37,6 +44,70 @@ class Category(BlogModel):
         return self.title
 
 
+# Поля публикации, которые выводит карточка в ленте.
+FEED_FIELDS = (
+    'id', 'title', 'excerpt', 'pub_date', 'image', 'thumbnail',
+    'is_published', 'category_id', 'location_id', 'author__username',
+)
+
+
+class FeedIterable(ModelIterable):
+    """Подставляет публикациям категорию и местоположение из кэша."""
+
+    def __iter__(self):
+        from .lookups import attach_lookups
+
+        yield from attach_lookups(super().__iter__())
+
+
+class PostQuerySet(CachedQuerySetMixin, models.QuerySet):
+
+    def published(self):
+        """Публикации, видимые всем.
+
+        Опубликованные, в опубликованной категории и с наступившей датой.
+        """
+        from .lookups import categories
+
+        return self.filter(
+            is_published=True,
+            category_id__in=categories.published_ids(),
+            pub_date__lte=timezone.now(),
+        )
+
+    def with_comment_count(self):
+        return self.annotate(
+            comment_count=Coalesce('comment_total__count', 0)
+        )
+
+    def _with_fields(self, fields):
+        clone = self.select_related('author').only(
+            *fields
+        ).order_by('-pub_date', '-id')
+        clone._iterable_class = FeedIterable
+        return clone
+
+    def for_feed(self):
+        """Публикации для карточек ленты.
+
+        Из БД читаются только выводимые поля публикации (вместо текста —
+        сохранённая выдержка) и имя автора; категории и местоположения
+        подставляются из кэша `blog.lookups` без JOIN.
+        """
+        return self._with_fields(FEED_FIELDS)
+
+    def for_detail(self):
+        """Как `for_feed`, но с готовым HTML текста публикации."""
+        return self._with_fields(FEED_FIELDS + ('text_html',))
+
+    def for_author(self, author_id, viewer=None):
+        """Публикации автора: все для него самого, видимые — для других."""
+        queryset = self.filter(author_id=author_id)
+        if viewer is None or viewer.pk != author_id:
+            queryset = queryset.published()
+        return queryset
+
+
 class Post(BlogModel):
     title = models.CharField('Заголовок', max_length=MAX_LENGTH)
     text = models.TextField('Текст', max_length=MAX_LENGTH_FOR_POST_TEXT)
@@ -66,6 +137,32 @@ class Post(BlogModel):
         related_name='posts_in_category'
     )
     image = models.ImageField('Фото', upload_to='posts_images', blank=True)
+    thumbnail = models.FileField(
+        'Миниатюра',
+        upload_to='posts_images/thumbs',
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Создаётся фоновой задачей по полю «Фото».')
+    excerpt = models.CharField(
+        'Выдержка',
+        max_length=MAX_LENGTH,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Начало текста для карточки в ленте; заполняется'
+        ' при сохранении.')
+    text_html = RenderedHTMLField(
+        'Текст в HTML',
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Строится из текста при сохранении.')
+
+    objects = PostQuerySet.as_manager()
+
+    # Поля, которые вычисляются из текста в `fill_computed_fields`.
+    COMPUTED_FIELDS = ('excerpt', 'text_html')
 
     class Meta:
         ordering = ('-pub_date',)
@@ -78,6 +175,23 @@ class Post(BlogModel):
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'post_id': self.pk})
 
+    def fill_computed_fields(self):
+        """Пересчитывает поля, производные от текста.
+
+        Вызывается из `save`; при `bulk_create` и `update` её нужно
+        вызывать явно (или запустить команду `backfill_posts`).
+        """
+        excerpt = Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+        self.excerpt = Truncator(excerpt).chars(MAX_LENGTH)
+        self.text_html = render_markup(self.text)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.fill_computed_fields()
+            if update_fields is not None:
+                update_fields = {*update_fields, *self.COMPUTED_FIELDS}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField('Комментарий', max_length=MAX_LENGTH_FOR_COMMENT)
@@ -95,14 +209,96 @@ class Comment(models.Model):
         'Дата и время создания',
         auto_now_add=True
     )
+    is_published = models.BooleanField(
+        'Опубликовано',
+        default=True,
+        help_text='Снимите галочку, чтобы скрыть комментарий.')
+    text_html = RenderedHTMLField(
+        'Комментарий в HTML',
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Строится из текста при сохранении.')
+
+    objects = CachedQuerySet.as_manager()
+
+    # Поля, которые вычисляются из текста в `fill_computed_fields`.
+    COMPUTED_FIELDS = ('text_html',)
 
     class Meta:
         ordering = ('created_at',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комменатрии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+            models.Index(
+                fields=('created_at',),
+                name='comment_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:MAX_LENGTH_TEXT]
 
     def get_absolute_url(self):
         return reverse("blog:post_detail", kwargs={"post_id": self.post.pk})
+
+    def fill_computed_fields(self):
+        self.text_html = render_markup(self.text)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.fill_computed_fields()
+            if update_fields is not None:
+                update_fields = {*update_fields, *self.COMPUTED_FIELDS}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class PostViews(models.Model):
+    """Число просмотров публикации.
+
+    Хранится отдельно от публикации: счётчик пишется часто, а запись в
+    таблицу публикаций сбрасывает кэш лент и страниц.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='views'
+    )
+    count = models.PositiveIntegerField('Просмотры', default=0)
+
+    class Meta:
+        verbose_name = 'просмотры публикации'
+        verbose_name_plural = 'Просмотры публикаций'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.count}'
+
+
+class PostCommentCount(models.Model):
+    """Число опубликованных комментариев к публикации.
+
+    Обновляется при записи комментариев, а фоновая задача
+    `blog.reconcile_counters` периодически пересчитывает его по таблице
+    комментариев. Лента читает готовое число вместо подсчёта с GROUP BY.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='comment_total'
+    )
+    count = models.PositiveIntegerField('Комментарии', default=0)
+
+    class Meta:
+        verbose_name = 'число комментариев публикации'
+        verbose_name_plural = 'Числа комментариев публикаций'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.count}'
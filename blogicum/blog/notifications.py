@@ -0,0 +1,77 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.constants import COMMENT_DIGEST_DELAY
+from jobs.queue import enqueue
+
+from .models import Comment
+
+User = get_user_model()
+
+
+def queue_comment_notification(comment):
+    """Ставит в очередь письмо автору публикации о новом комментарии.
+
+    Пока письмо ждёт отправки (`COMMENT_DIGEST_DELAY` секунд), новые
+    комментарии не создают новых задач: все они попадут в одно письмо.
+    """
+    recipient_id = comment.post.author_id
+    if recipient_id == comment.author_id:
+        return
+    enqueue(
+        'blog.send_comment_digest',
+        {
+            'recipient_id': recipient_id,
+            'since': comment.created_at.isoformat(),
+        },
+        delay=COMMENT_DIGEST_DELAY,
+        key=f'comment-digest:{recipient_id}',
+    )
+
+
+def send_comment_digests(payloads):
+    """Отправляет сводки о комментариях всем получателям одной пачкой."""
+    until = timezone.now()
+    since = {}
+    for payload in payloads:
+        recipient_id = payload['recipient_id']
+        started = parse_datetime(payload['since'])
+        since[recipient_id] = min(since.get(recipient_id, started), started)
+    recipients = User.objects.filter(pk__in=since).exclude(email='')
+    recipients = {user.pk: user for user in recipients}
+    if not recipients:
+        return
+    comments = Comment.objects.filter(
+        post__author_id__in=recipients,
+        is_published=True,
+        created_at__gte=min(since.values()),
+        created_at__lt=until,
+    ).exclude(
+        author_id=F('post__author_id')
+    ).select_related('post', 'author').order_by('post_id', 'created_at')
+    comments_by_recipient = defaultdict(list)
+    for comment in comments:
+        recipient_id = comment.post.author_id
+        if comment.created_at >= since[recipient_id]:
+            comments_by_recipient[recipient_id].append(comment)
+    messages = [
+        EmailMessage(
+            subject=f'Новые комментарии к вашим публикациям: {len(items)}',
+            body=render_to_string('emails/comment_digest.txt', {
+                'recipient': recipients[recipient_id],
+                'comments': items,
+                'site_url': settings.SITE_URL,
+            }),
+            to=[recipients[recipient_id].email],
+        )
+        for recipient_id, items in comments_by_recipient.items()
+    ]
+    if messages:
+        get_connection().send_messages(messages)
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+
+from core.constants import USER_CACHE_TIMEOUT
+from core.querycache import tables_changed
+
+User = get_user_model()
+
+SUMMARY_FIELDS = (
+    'id', 'username', 'first_name', 'last_name', 'date_joined', 'is_staff'
+)
+
+# Версия данных авторов для кэша страниц, как у таблиц в core.querycache.
+# Таблица auth_user не подходит: при каждом входе в неё пишется last_login.
+PROFILES_VERSION = 'blog_profiles'
+
+
+@dataclass(frozen=True)
+class UserSummary:
+    """Данные пользователя, нужные странице профиля и ссылкам на автора."""
+
+    id: int
+    username: str
+    full_name: str
+    date_joined: datetime
+    is_staff: bool
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.pk,
+            username=user.username,
+            full_name=user.get_full_name(),
+            date_joined=user.date_joined,
+            is_staff=user.is_staff,
+        )
+
+
+def get_cache_key(username: str) -> str:
+    return f'blog:user:{username}'
+
+
+def get_user_summary(username: str) -> Optional[UserSummary]:
+    """Функция возвращает данные пользователя из кэша или из БД."""
+    key = get_cache_key(username)
+    summary = cache.get(key)
+    if summary is None:
+        user = User.objects.only(*SUMMARY_FIELDS).filter(
+            username=username
+        ).first()
+        if user is None:
+            return None
+        summary = UserSummary.from_user(user)
+        cache.set(key, summary, USER_CACHE_TIMEOUT)
+    return summary
+
+
+def get_user_summary_or_404(username: str) -> UserSummary:
+    summary = get_user_summary(username)
+    if summary is None:
+        raise Http404('Пользователь не найден.')
+    return summary
+
+
+def invalidate_user_summary(*usernames: str) -> None:
+    cache.delete_many([get_cache_key(username) for username in usernames])
+
+
+def invalidate_profile_pages() -> None:
+    """Сбрасывает кэш страниц, на которых показаны данные авторов."""
+    tables_changed(DEFAULT_DB_ALIAS, {PROFILES_VERSION})
@@ -0,0 +1,176 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from .commentcounts import recount_comments
+from .existence import post_ids, usernames
+from .feedindex import feed_index
+from .lookups import categories, locations
+from .models import Category, Comment, Location, Post
+from .notifications import queue_comment_notification
+from .profiles import (SUMMARY_FIELDS, invalidate_profile_pages,
+                       invalidate_user_summary)
+from .streams import publish_comment
+from .surrogate import FEED_KEY, post_keys, queue_purge
+from .updates import reset_high_water_mark
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=User)
+def remember_old_username(sender, instance, update_fields=None, **kwargs):
+    """Запоминает прежнее имя пользователя, чтобы сбросить его кэш."""
+    instance._old_username = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+            SUMMARY_FIELDS):
+        return
+    instance._old_username = User.objects.filter(
+        pk=instance.pk
+    ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def reset_user_summary(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & set(
+            SUMMARY_FIELDS):
+        return
+    usernames = {instance.username}
+    old_username = getattr(instance, '_old_username', None)
+    if old_username:
+        usernames.add(old_username)
+    invalidate_user_summary(*usernames)
+    invalidate_profile_pages()
+
+
+@receiver(post_save, sender=User)
+def add_username(sender, instance, **kwargs):
+    usernames.add(instance.username)
+
+
+@receiver(post_delete, sender=User)
+def drop_user_summary(sender, instance, **kwargs):
+    invalidate_user_summary(instance.username)
+    invalidate_profile_pages()
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_image(sender, instance, **kwargs):
+    instance._old_image = None
+    if instance.pk is not None:
+        instance._old_image = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnail(sender, instance, raw=False, **kwargs):
+    """Ставит в очередь миниатюру, если у публикации сменилось фото."""
+    if raw or instance.image.name == getattr(instance, '_old_image', None):
+        return
+    if instance.image:
+        enqueue('blog.make_post_thumbnail', {
+            'post_id': instance.pk,
+            'image': instance.image.name,
+        })
+    elif instance.thumbnail:
+        instance.thumbnail.delete(save=False)
+        Post.objects.filter(pk=instance.pk).update(thumbnail='')
+
+
+@receiver(post_save, sender=Comment)
+def notify_post_author(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        queue_comment_notification(instance)
+        transaction.on_commit(lambda: publish_comment(instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_categories(sender, **kwargs):
+    categories.invalidate_on_commit()
+    reset_high_water_mark()
+    feed_index.invalidate()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def reset_locations(sender, **kwargs):
+    locations.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_feed_mark(sender, **kwargs):
+    reset_high_water_mark()
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_count(sender, instance, raw=False, **kwargs):
+    if not raw:
+        recount_comments([instance.post_id])
+
+
+@receiver(post_delete, sender=Comment)
+def reduce_comment_count(sender, instance, **kwargs):
+    recount_comments([instance.post_id], create_missing=False)
+
+
+@receiver(post_save, sender=Post)
+def add_post_id(sender, instance, created, **kwargs):
+    if created:
+        post_ids.add(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def update_feed_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_index.post_saved(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_feed_index(sender, instance, **kwargs):
+    feed_index.post_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        queue_purge(FEED_KEY, *post_keys(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        queue_purge(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def purge_author_pages(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    """Очищает профиль и ленты с публикациями автора при его правке."""
+    if raw or update_fields is not None and not set(update_fields) & set(
+            SUMMARY_FIELDS):
+        return
+    queue_purge(f'author:{instance.pk}')
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_location_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        queue_purge(f'location:{instance.pk}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        queue_purge(FEED_KEY, f'category:{instance.slug}')
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+
+from core.constants import SSE_KEEPALIVE
+from core.pubsub import get_broker, publish
+
+from .models import Comment, Post
+
+STREAM_PATH = re.compile(r'^/posts/(?P<post_id>\d+)/comments/stream/$')
+
+
+def get_channel(post_id):
+    return f'blog:post:{post_id}:comments'
+
+
+def get_stream_url(post_id):
+    return f'/posts/{post_id}/comments/stream/'
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.id,
+        'author': comment.author.username,
+        'html': render_to_string(
+            'includes/comment.html', {'comment': comment}
+        ),
+    }
+
+
+def publish_comment(comment):
+    """Отправляет опубликованный комментарий подписчикам потока."""
+    if comment.is_published:
+        publish(get_channel(comment.post_id), serialize_comment(comment))
+
+
+def format_event(message):
+    data = json.dumps(message, ensure_ascii=False)
+    return f'id: {message["id"]}\nevent: comment\ndata: {data}\n\n'.encode()
+
+
+def _db(func):
+    """Как sync_to_async, но закрывает устаревшие соединения с БД."""
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
+
+
+@_db
+def is_visible_post(post_id):
+    return Post.objects.published().filter(pk=post_id).exists()
+
+
+@_db
+def get_missed_comments(post_id, last_id):
+    comments = Comment.objects.filter(
+        post_id=post_id, is_published=True, id__gt=last_id
+    ).select_related('author').order_by('id')
+    return [serialize_comment(comment) for comment in comments]
+
+
+def get_last_event_id(scope):
+    for name, value in scope.get('headers', ()):
+        if name == b'last-event-id':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def send_status(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': body.encode()})
+
+
+async def send_event(send, message):
+    await send_chunk(send, format_event(message))
+
+
+async def send_chunk(send, chunk):
+    await send({
+        'type': 'http.response.body', 'body': chunk, 'more_body': True,
+    })
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def comment_stream(scope, receive, send):
+    """ASGI-приложение с потоком новых комментариев публикации (SSE).
+
+    Django 3.2 не умеет отдавать асинхронный потоковый ответ, поэтому
+    поток обслуживается отдельным ASGI-приложением (см. blogicum.asgi).
+    При переподключении браузер передаёт Last-Event-ID, и пропущенные
+    комментарии досылаются из БД.
+    """
+    post_id = int(STREAM_PATH.match(scope['path'])['post_id'])
+    if scope['method'] != 'GET':
+        await send_status(send, 405, 'Метод не поддерживается.')
+        return
+    if not await is_visible_post(post_id):
+        await send_status(send, 404, 'Публикация не найдена.')
+        return
+
+    async with get_broker().subscribe(get_channel(post_id)) as messages:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        last_id = get_last_event_id(scope)
+        if last_id is not None:
+            for message in await get_missed_comments(post_id, last_id):
+                await send_event(send, message)
+
+        disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+        next_message = None
+        try:
+            while True:
+                if next_message is None:
+                    next_message = asyncio.ensure_future(messages.__anext__())
+                done, _ = await asyncio.wait(
+                    {next_message, disconnect},
+                    timeout=SSE_KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnect in done:
+                    break
+                if next_message in done:
+                    await send_event(send, next_message.result())
+                    next_message = None
+                else:
+                    await send_chunk(send, b': keepalive\n\n')
+        finally:
+            disconnect.cancel()
+            if next_message is not None:
+                next_message.cancel()
+
+
+def route_comment_streams(application):
+    """Оборачивает ASGI-приложение Django маршрутом потока комментариев."""
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and STREAM_PATH.match(scope['path']):
+            await comment_stream(scope, receive, send)
+        else:
+            await application(scope, receive, send)
+    return router
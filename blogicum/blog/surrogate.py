@@ -0,0 +1,62 @@
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.constants import SURROGATE_MAX_AGE
+from jobs.queue import enqueue
+
+from .feedindex import feed_index
+from .lookups import categories
+from .updates import get_next_pub_date
+
+FEED_KEY = 'feed'
+
+
+def post_keys(post):
+    """Ключи страницы публикации и всего, что на ней показано."""
+    keys = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.location_id:
+        keys.append(f'location:{post.location_id}')
+    category = (
+        categories.get(post.category_id) if post.category_id else None
+    )
+    if category is not None:
+        keys.append(f'category:{category.slug}')
+    return keys
+
+
+def page_keys(posts):
+    """Ключи публикаций на странице ленты, их авторов и местоположений."""
+    keys = set()
+    for post in posts:
+        keys.update((f'post:{post.pk}', f'author:{post.author_id}'))
+        if post.location_id:
+            keys.add(f'location:{post.location_id}')
+    return sorted(keys)
+
+
+def feed_max_age(request):
+    """Срок жизни ленты в прокси.
+
+    Не дольше, чем до выхода ближайшей отложенной публикации: её
+    появление в ленте не сопровождается записью в БД и очисткой.
+    """
+    if settings.FEED_INDEX_ENABLED:
+        next_pub_date = feed_index.next_pub_date()
+    else:
+        next_pub_date = get_next_pub_date()
+    if next_pub_date is None:
+        return SURROGATE_MAX_AGE
+    delay = (next_pub_date - timezone.now()).total_seconds()
+    return max(min(math.ceil(delay), SURROGATE_MAX_AGE), 0)
+
+
+def queue_purge(*keys):
+    """Ставит в очередь очистку страниц прокси по ключам.
+
+    Пакетный обработчик объединяет ключи всех взятых задач и отправляет
+    их несколькими запросами (см. core.surrogate.purge_surrogate_keys).
+    """
+    if settings.SURROGATE_PURGE_URL and keys:
+        enqueue('blog.purge_surrogate_keys', {'keys': sorted(set(keys))})
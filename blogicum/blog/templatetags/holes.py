@@ -0,0 +1,19 @@
+from django import template
+
+from core.holes import render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """Персональный фрагмент страницы, см. core.holes.
+
+    Пример: `{% hole "comment_form" post_id=post.id %}`. Без запроса в
+    контексте (например, при рендеринге для потока событий) фрагмент
+    пустой.
+    """
+    request = context.get('request')
+    if request is None:
+        return ''
+    return render_hole(request, name, kwargs)
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from core.constants import UPDATES_LIMIT, UPDATES_MARK_TIMEOUT
+
+from .models import Post
+
+MARK_CACHE_KEY = 'blog:feed:high-water-mark'
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def to_micros(moment):
+    return (moment - EPOCH) // MICROSECOND
+
+
+def from_micros(micros):
+    return EPOCH + micros * MICROSECOND
+
+
+def format_cursor(cursor):
+    return '{}-{}'.format(*cursor)
+
+
+def parse_cursor(value):
+    """Разбирает курсор вида `<микросекунды pub_date>-<id>`."""
+    try:
+        micros, pk = value.split('-')
+        return int(micros), int(pk)
+    except (AttributeError, ValueError):
+        raise InvalidCursor(f'Некорректный курсор: {value!r}.')
+
+
+def compute_high_water_mark():
+    """Считает курсор последней видимой публикации по БД.
+
+    Вместе с курсором возвращает время ближайшей отложенной публикации:
+    после него отметку нужно пересчитать, хотя ни одна запись не менялась.
+    """
+    latest = Post.objects.published().order_by(
+        '-pub_date', '-id'
+    ).values_list('pub_date', 'id').first()
+    cursor = (to_micros(latest[0]), latest[1]) if latest else (0, 0)
+    scheduled = Post.objects.filter(
+        is_published=True, pub_date__gt=timezone.now()
+    ).order_by('pub_date').values_list('pub_date', flat=True).first()
+    return {
+        'cursor': cursor,
+        'until': to_micros(scheduled) if scheduled else None,
+    }
+
+
+def get_mark():
+    mark = cache.get(MARK_CACHE_KEY)
+    if mark is None or (
+        mark['until'] is not None
+        and to_micros(timezone.now()) >= mark['until']
+    ):
+        mark = compute_high_water_mark()
+        cache.set(MARK_CACHE_KEY, mark, UPDATES_MARK_TIMEOUT)
+    return mark
+
+
+def get_high_water_mark():
+    """Возвращает курсор последней видимой публикации.
+
+    Отметка хранится в кэше и сбрасывается сигналами при изменении
+    публикаций и категорий, поэтому ответ «ничего нового» не требует
+    запросов к БД. Если сброс всё же потерян, отметка устареет не больше
+    чем на `UPDATES_MARK_TIMEOUT` секунд.
+    """
+    return tuple(get_mark()['cursor'])
+
+
+def get_next_pub_date():
+    """Когда выйдет ближайшая отложенная публикация (None — нет таких)."""
+    until = get_mark()['until']
+    return None if until is None else from_micros(until)
+
+
+def reset_high_water_mark():
+    """Сбрасывает отметку сразу и ещё раз после фиксации транзакции.
+
+    Второй сброс нужен, чтобы запрос, прочитавший БД до фиксации, не
+    оставил в кэше старую отметку.
+    """
+    cache.delete(MARK_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(MARK_CACHE_KEY))
+
+
+def get_posts_after(cursor, limit=UPDATES_LIMIT):
+    """Функция возвращает видимые публикации новее курсора.
+
+    Публикации идут от старых к новым; если их больше `limit`, клиент
+    получает первые `limit` и продолжает с курсора последней из них.
+    """
+    micros, pk = cursor
+    pub_date = from_micros(micros)
+    return list(Post.objects.published().filter(
+        pub_date__gte=pub_date
+    ).exclude(
+        pub_date=pub_date, id__lte=pk
+    ).for_feed().order_by('pub_date', 'id')[:limit])
+
+
+def serialize_post(post):
+    return {
+        'id': post.id,
+        'title': post.title,
+        'author': post.author.username,
+        'category': post.category.title if post.category else None,
+        'pub_date': post.pub_date.isoformat(),
+        'url': reverse('blog:post_detail', kwargs={'post_id': post.id}),
+    }
@@ -22,11 +22,17 @@ urlpatterns = [
         name='add_comment'
     ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/views/',
+        views.count_post_view,
+        name='count_post_view'
+    ),
     path(
         'posts/<int:post_id>/delete/',
         views.PostDeleteView.as_view(),
         name='delete_post'
     ),
+    path('posts/updates/', views.post_updates, name='post_updates'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path(
         'posts/<int:post_id>/edit/',
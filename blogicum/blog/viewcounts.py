@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from core.constants import (COUNTERS_RECONCILE_BATCH, VIEW_COUNT_CACHE_TIMEOUT,
+                            VIEW_FLUSH_BATCH)
+from core.counters import BufferedCounter
+
+from .models import Post, PostViews
+
+
+def get_cache_key(post_id):
+    return f'blog:views:{post_id}'
+
+
+def flush_view_counts(counts):
+    """Прибавляет накопленные просмотры к счётчикам в БД.
+
+    Недостающие строки счётчиков создаются одним INSERT, а приращения
+    каждой пачки из `VIEW_FLUSH_BATCH` публикаций записываются одним
+    UPDATE с CASE. Все пачки пишутся в одной транзакции: при ошибке
+    BufferedCounter возвращает в буфер все приращения, и уже записанные
+    пачки не должны засчитаться повторно. Просмотры удалённых публикаций
+    отбрасываются.
+    """
+    post_ids = sorted(counts)
+    with transaction.atomic():
+        for start in range(0, len(post_ids), VIEW_FLUSH_BATCH):
+            batch = post_ids[start:start + VIEW_FLUSH_BATCH]
+            existing = list(
+                Post.objects.filter(pk__in=batch).values_list('pk', flat=True)
+            )
+            if not existing:
+                continue
+            PostViews.objects.bulk_create(
+                [PostViews(post_id=post_id) for post_id in existing],
+                ignore_conflicts=True,
+            )
+            PostViews.objects.filter(post_id__in=existing).update(
+                count=F('count') + Case(
+                    *(When(post_id=post_id, then=Value(counts[post_id]))
+                      for post_id in existing),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+    cache.delete_many([get_cache_key(post_id) for post_id in post_ids])
+
+
+view_counter = BufferedCounter(flush_view_counts)
+
+
+def refresh_view_counts(batch_size=COUNTERS_RECONCILE_BATCH):
+    """Заменяет числа просмотров в кэше сохранёнными в БД.
+
+    Просмотры считаются только в памяти процессов, поэтому пересчитать их
+    не по чему; сверка исправляет показ: кэш мог пережить запись в БД,
+    сделанную в обход `flush_view_counts`.
+    """
+    last_id = 0
+    while True:
+        counts = dict(PostViews.objects.filter(post_id__gt=last_id).order_by(
+            'post_id'
+        ).values_list('post_id', 'count')[:batch_size])
+        if not counts:
+            return
+        cache.set_many({
+            get_cache_key(post_id): count for post_id, count in counts.items()
+        }, VIEW_COUNT_CACHE_TIMEOUT)
+        last_id = max(counts)
+
+
+def get_view_count(post_id):
+    """Число просмотров публикации для показа.
+
+    Сохранённое в БД число берётся из кэша, к нему прибавляются ещё не
+    сброшенные просмотры этого процесса. Просмотры из других процессов
+    видны не позже чем через `VIEW_COUNTS_FLUSH_INTERVAL` секунд.
+    """
+    stored = cache.get_or_set(
+        get_cache_key(post_id),
+        lambda: PostViews.objects.filter(post_id=post_id).values_list(
+            'count', flat=True
+        ).first() or 0,
+        VIEW_COUNT_CACHE_TIMEOUT,
+    )
+    return stored + view_counter.pending(post_id)
+
+
+def record_view(post_id):
+    """Засчитывает просмотр публикации без запросов к БД."""
+    view_counter.incr(post_id)
+    if settings.VIEW_COUNTS_FLUSH_INTERVAL:
+        view_counter.start(settings.VIEW_COUNTS_FLUSH_INTERVAL)
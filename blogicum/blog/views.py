@@ -1,48 +1,104 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
-from blog.models import Category, Post
-from core.constants import PAGINATOR
+from blog.models import Category, Comment, Location, Post
+from core.constants import PAGINATOR, UPDATES_MAX_WAIT, UPDATES_POLL_INTERVAL
+from core.holes import cache_page_with_holes
+from core.paginator import FeedPaginator
+from core.ratelimit import RateLimitMixin, ratelimit
+from core.surrogate import add_surrogate_keys, edge_cache
+from core.views import not_found
 
+from .existence import post_ids, require_existing, usernames
+from .feedindex import feed_index
 from .forms import CommentForm
+from .lookups import categories
 from .mixins import BaseCommentMixin, BasePostMixin, OnlyAuthorMixin
+from .profiles import PROFILES_VERSION, get_user_summary_or_404
+from .streams import get_stream_url
+from .surrogate import FEED_KEY, feed_max_age, page_keys, post_keys
+from .updates import (InvalidCursor, format_cursor, get_high_water_mark,
+                      get_posts_after, parse_cursor, serialize_post,
+                      to_micros)
+from .viewcounts import get_view_count, record_view
 
 User = get_user_model()
 
+# Таблицы, при записи в которые сбрасывается кэш страниц блога. Вместо
+# auth_user — версия профилей, которую сигналы меняют при их правке.
+PAGE_TABLES = tuple(
+    model._meta.db_table for model in (Post, Comment, Category, Location)
+) + (PROFILES_VERSION,)
+
+
+def paginate(request, object_list):
+    """Функция возвращает запрошенную страницу ленты."""
+    paginator = FeedPaginator(
+        object_list, PAGINATOR, count_limit=settings.FEED_COUNT_LIMIT
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def get_feed(queryset, **scope):
+    """Функция возвращает ленту публикаций для пагинатора.
 
-def get_related_post_list():
-    """Функция возвращает объекты модели Post со связанными моделями."""
-    return Post.objects.select_related(
-        'category', 'location', 'author')
+    С `FEED_INDEX_ENABLED` id публикаций берутся из индекса в памяти
+    (`scope` — категория или автор), иначе используется `queryset`.
+    """
+    if settings.FEED_INDEX_ENABLED:
+        return feed_index.feed(**scope)
+    return queryset.with_comment_count().for_feed()
 
 
+@method_decorator(edge_cache(max_age=feed_max_age), name='dispatch')
+@method_decorator(cache_page_with_holes(PAGE_TABLES), name='dispatch')
 class IndexListView(ListView):
     """Отображение всех публикаций."""
 
     model = Post
     paginate_by = PAGINATOR
+    paginator_class = FeedPaginator
     template_name = 'blog/index.html'
 
+    def get_paginator(self, *args, **kwargs):
+        kwargs.setdefault('count_limit', settings.FEED_COUNT_LIMIT)
+        return super().get_paginator(*args, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_queryset(self):
-        queryset = get_related_post_list().filter(
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        ).annotate(comment_count=Count('comment')).order_by('-pub_date')
-        return queryset
+        return get_feed(Post.objects.published())
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        return add_surrogate_keys(
+            response, [FEED_KEY, *page_keys(context['page_obj'])]
+        )
 
 
-class PostCreateView(BasePostMixin, CreateView):
+class PostCreateView(RateLimitMixin, BasePostMixin, CreateView):
     """Создание публикации."""
 
+    ratelimit_scope = 'post'
+
     def form_valid(self, form):
         form.instance.author = self.request.user
         return super().form_valid(form)
@@ -85,9 +141,14 @@ class ProfileUpdateView(UserPassesTestMixin, UpdateView):
             kwargs={'username': self.request.user.username}
         )
 
+    def get_object(self, queryset=None):
+        # test_func пропускает только владельца профиля. Объект читается
+        # заново: невалидная форма меняет его поля, и request.user
+        # остался бы с ними до конца запроса.
+        return User.objects.get(pk=self.request.user.pk)
+
     def test_func(self):
-        object = self.get_object()
-        return object.username == self.request.user.username
+        return self.kwargs[self.slug_url_kwarg] == self.request.user.username
 
 
 class CommentDeleteView(BaseCommentMixin, DeleteView):
@@ -102,6 +163,7 @@ class CommentUpdateView(BaseCommentMixin, UpdateView):
     ...
 
 
+@ratelimit('comment')
 @login_required
 def add_comment(request, post_id):
     """Представление для добавления комментария."""
@@ -115,65 +177,135 @@ def add_comment(request, post_id):
     return redirect('blog:post_detail', post_id=post_id)
 
 
+def is_own_profile(request, username):
+    return request.user.is_authenticated and request.user.username == username
+
+
+@edge_cache(max_age=feed_max_age)
+@require_existing(usernames, 'username')
+@cache_page_with_holes(PAGE_TABLES, skip=is_own_profile)
 def get_profile(request, username):
     """Представление профиля пользователя."""
-    profile = get_object_or_404(User, username=username)
-    publications = profile.posts.annotate(
-        comment_count=Count('comment')
-    ).order_by('-pub_date')
-    paginator = Paginator(publications, PAGINATOR)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    profile = get_user_summary_or_404(username)
+    publications = Post.objects.for_author(profile.id, request.user)
+    if request.user.pk != profile.id:
+        publications = get_feed(publications, author_id=profile.id)
+    else:
+        publications = publications.with_comment_count().for_feed()
+    page_obj = paginate(request, publications)
     context = {
         'profile': profile,
         'page_obj': page_obj
     }
-    return render(request, 'blog/profile.html', context)
+    response = render(request, 'blog/profile.html', context)
+    return add_surrogate_keys(
+        response, [f'author:{profile.id}', *page_keys(page_obj)]
+    )
 
 
+@edge_cache()
+@require_existing(post_ids, 'post_id')
+@cache_page_with_holes(PAGE_TABLES)
 def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
     """Функция отображает отдельную публикацию."""
-    post = get_object_or_404(get_related_post_list(), pk=post_id)
+    post = get_object_or_404(Post.objects.for_detail().cached(), pk=post_id)
     form = CommentForm()
-    comments = post.comment.select_related('author')
+    comments = post.comment.filter(
+        is_published=True
+    ).select_related('author').cached()
     context = {
         'post': post,
         'form': form,
         'comments': comments
     }
 
-    if request.user == post.author:
-        return render(request, 'blog/detail.html', context)
-
-    if (
+    is_visible = (
         post.is_published
         and post.pub_date <= timezone.now()
+        and post.category is not None
         and post.category.is_published
-    ):
-        return render(request, 'blog/detail.html', context)
+    )
+    if is_visible:
+        context['comments_stream_url'] = get_stream_url(post.id)
+        response = render(request, 'blog/detail.html', context)
+        return add_surrogate_keys(response, post_keys(post))
+    if request.user == post.author:
+        # Скрытую публикацию видит только автор: в общий кэш её нельзя.
+        response = render(request, 'blog/detail.html', context)
+        patch_cache_control(response, private=True)
+        return response
 
     return render(request, 'pages/404.html', status=404)
 
 
+@csrf_exempt
+@require_POST
+@never_cache
+@require_existing(post_ids, 'post_id')
+def count_post_view(request: HttpRequest, post_id: int) -> JsonResponse:
+    """Засчитывает просмотр публикации и возвращает число просмотров.
+
+    Страницу публикации отдаёт из кэша прокси, поэтому просмотр
+    отправляет её скрипт отдельным запросом, который не кэшируется.
+    """
+    record_view(post_id)
+    return JsonResponse({'views': get_view_count(post_id)})
+
+
+@edge_cache(max_age=feed_max_age)
+@cache_page_with_holes(PAGE_TABLES)
 def category_posts(request: HttpRequest, category_slug: str) -> HttpResponse:
     """Функция отображает публикации в категории."""
-    category = get_object_or_404(
-        Category,
-        is_published=True,
-        slug=category_slug
-    )
+    category = categories.get_by('slug', category_slug)
+    if category is None or not category.is_published:
+        return not_found(request)
 
-    post_list = category.posts_in_category.filter(
-        pub_date__lte=timezone.now(),
-        is_published=True
-    ).annotate(
-        comment_count=Count('comment')
-    ).order_by('-pub_date')
+    post_list = get_feed(
+        Post.objects.published().filter(category_id=category.id),
+        category_id=category.id,
+    )
 
-    paginator = Paginator(post_list, PAGINATOR)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list)
 
     context: dict = {'category': category,
                      'page_obj': page_obj}
-    return render(request, 'blog/category.html', context)
+    response = render(request, 'blog/category.html', context)
+    return add_surrogate_keys(
+        response, [f'category:{category.slug}', *page_keys(page_obj)]
+    )
+
+
+async def post_updates(request: HttpRequest) -> JsonResponse:
+    """Публикации, вышедшие после курсора `after`.
+
+    Без `after` возвращает текущий курсор. С `wait=<секунды>` ждёт новых
+    публикаций (long polling) не дольше `UPDATES_MAX_WAIT`. Пока новых
+    публикаций нет, ответ строится по отметке в кэше без запросов к БД.
+    """
+    mark = await sync_to_async(get_high_water_mark)()
+    if 'after' not in request.GET:
+        return JsonResponse({'posts': [], 'cursor': format_cursor(mark)})
+    try:
+        cursor = parse_cursor(request.GET['after'])
+        wait = min(float(request.GET.get('wait', 0)), UPDATES_MAX_WAIT)
+    except (InvalidCursor, ValueError) as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while mark <= cursor and loop.time() < deadline:
+        await asyncio.sleep(
+            min(UPDATES_POLL_INTERVAL, deadline - loop.time())
+        )
+        mark = await sync_to_async(get_high_water_mark)()
+    if mark <= cursor:
+        return JsonResponse({'posts': [], 'cursor': format_cursor(cursor)})
+
+    posts = await sync_to_async(get_posts_after)(cursor)
+    if posts:
+        last = posts[-1]
+        cursor = (to_micros(last.pub_date), last.id)
+    return JsonResponse({
+        'posts': [serialize_post(post) for post in posts],
+        'cursor': format_cursor(cursor),
+    })
@@ -4,4 +4,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from blog.streams import route_comment_streams  # noqa: E402
+
+application = route_comment_streams(django_application)
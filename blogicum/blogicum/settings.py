@@ -37,6 +37,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'pages.apps.PagesConfig',
     'blog.apps.BlogConfig',
+    'jobs.apps.JobsConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -110,8 +111,74 @@ INTERNAL_IPS = [
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма уходят в очередь фоновых задач, а доставляет их обработчик
+# (`python manage.py run_jobs`) через JOBS_EMAIL_BACKEND.
+EMAIL_BACKEND = 'jobs.backends.QueuedEmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+JOBS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Для SMTP: JOBS_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# и стандартные EMAIL_HOST, EMAIL_PORT, EMAIL_HOST_USER и т. д. Пачка писем
+# уходит через одно соединение, а все обработчики очереди вместе шлют не
+# быстрее EMAIL_RATE_LIMIT писем в секунду (лимит хранится в общем кэше).
+EMAIL_RATE_LIMIT = None
+
+# Адрес сайта для ссылок в письмах.
+SITE_URL = 'http://127.0.0.1:8000'
+
+# Выполнять фоновые задачи сразу после фиксации транзакции, без очереди.
+JOBS_ALWAYS_EAGER = False
+
+# Кэш по умолчанию — двухуровневый: L1 в памяти процесса перед общим
+# кэшем 'shared'. L1 отстаёт от записей других процессов не больше чем на
+# L1_TIMEOUT секунд; данные, которым это недопустимо (сессии, лимиты
+# запросов, брокер сообщений), читаются прямо из 'shared'
+# (core.cache.shared_cache). 'shared' должен быть общим для всех процессов:
+# по умолчанию это файловый кэш с атомарными add/incr (процессы одной
+# машины), при нескольких серверах — Memcached или Redis. LocMemCache у
+# каждого процесса свой и подходит только для тестов.
+SHARED_CACHE_ALIAS = 'shared'
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoLevelCache',
+        'LOCATION': 'blogicum',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'L2': SHARED_CACHE_ALIAS,
+            'L1_MAX_BYTES': 16 * 1024 * 1024,
+            'L1_TIMEOUT': 5,
+        },
+    },
+    SHARED_CACHE_ALIAS: {
+        'BACKEND': 'core.cache.LockedFileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'TIMEOUT': 300,
+        # Здесь и сессии, и блокировки, и счётчики: при 300 записях по
+        # умолчанию их вытесняли бы кэшированные страницы и запросы.
+        'OPTIONS': {'MAX_ENTRIES': 50_000},
+    },
+}
+
+# Сессии читаются из кэша и только при промахе — из БД. Без cookie сессия не
+# загружается вовсе, а CSRF-токен хранится в cookie, поэтому анонимные
+# читатели к таблице django_session не обращаются. Просроченные сессии
+# удаляет команда `purge_sessions`.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = SHARED_CACHE_ALIAS
+SESSION_SAVE_EVERY_REQUEST = False
+CSRF_USE_SESSIONS = False
+
+# Брокер сообщений для потоков событий (SSE). InProcessBroker работает в
+# пределах одного процесса; для нескольких процессов сервера нужен
+# core.pubsub.CacheBroker с общим кэшем (Redis, Memcached).
+PUBSUB_BROKER = 'core.pubsub.InProcessBroker'
+
+# Лимиты на запись: не больше N запросов за период (s, m, h, d) с одного IP
+# и от одного пользователя. Сверх лимита — ответ 429 до обращения к БД.
+RATELIMIT_ENABLED = True
+RATELIMITS = {
+    'comment': {'ip': '30/m', 'user': '10/m'},
+    'post': {'ip': '10/m', 'user': '5/m'},
+}
 
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'blog:index'
@@ -119,3 +186,35 @@ LOGIN_REDIRECT_URL = 'blog:index'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 USE_L10N = False
+
+# Ленты берут id публикаций из индекса в памяти процесса (blog.feedindex)
+# и читают из БД только строки текущей страницы.
+FEED_INDEX_ENABLED = True
+
+# Функция, которая превращает текст публикаций и комментариев в HTML при
+# сохранении. Она должна экранировать или очищать HTML. После смены
+# рендерера запустите `backfill_posts`.
+MARKUP_RENDERER = 'core.markup.render_plain'
+
+# Если задано, ленты не считают COUNT(*) по всей таблице, а ограничиваются
+# этим числом записей (или записями до запрошенной страницы).
+FEED_COUNT_LIMIT = None
+
+# Ленты, профили и публикации кэшируются целиком, а шапка, форма
+# комментария и кнопки автора дорисовываются для каждого пользователя
+# (core.holes). Кэш сбрасывается при записи в таблицы страницы.
+PAGE_CACHE_ENABLED = True
+
+# Обратный прокси (Varnish, Fastly и т. п.) перед приложением. Страницы
+# блога помечаются ключами в заголовке Surrogate-Key, а при изменении
+# данных фоновая задача очищает их POST-запросом на этот адрес. None —
+# очистка выключена, и прокси разрешено хранить страницы не дольше
+# SURROGATE_UNPURGED_MAX_AGE. SURROGATE_PURGE_HEADERS — заголовки запроса
+# очистки, например {'Fastly-Key': '...'}.
+SURROGATE_PURGE_URL = None
+SURROGATE_PURGE_HEADERS = {}
+
+# Просмотры публикаций копятся в памяти процесса и раз в столько секунд
+# записываются в БД одним UPDATE (blog.viewcounts). None — фоновый сброс
+# выключен, счётчик сбрасывается только вызовом view_counter.flush().
+VIEW_COUNTS_FLUSH_INTERVAL = 10
@@ -0,0 +1,50 @@
+import math
+from hashlib import blake2b
+
+MIN_BITS = 1024
+
+
+class BloomFilter:
+    """Фильтр Блума: множество без ложноотрицательных ответов.
+
+    `value in bloom` ложно, только если значение точно не добавлялось;
+    истина может оказаться ошибкой с вероятностью около `error_rate`,
+    пока добавлено не больше `capacity` значений. Удалять значения
+    нельзя — фильтр строится заново.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(
+            MIN_BITS,
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_values(cls, values, error_rate=0.01, headroom=2):
+        """Фильтр со значениями `values` и запасом места для новых."""
+        values = list(values)
+        bloom = cls(len(values) * headroom, error_rate)
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    def _positions(self, value):
+        digest = blake2b(str(value).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (first + i * second) % self.size for i in range(self.hash_count)
+        )
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
@@ -0,0 +1,443 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+from core.constants import (CACHE_L1_MAX_BYTES, CACHE_L1_TIMEOUT,
+                            CACHE_LOCK_TIMEOUT, CACHE_LOCK_WAIT)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_MISSING = object()
+
+
+class CacheMetrics:
+    """Счётчики попаданий и промахов двухуровневого кэша."""
+
+    FIELDS = ('l1_hits', 'l2_hits', 'misses', 'evictions', 'coalesced')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, name, delta=1):
+        with self._lock:
+            self.counts[name] += delta
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+class LRUStore:
+    """Кэш в памяти процесса с вытеснением по суммарному размеру.
+
+    Значения хранятся сериализованными: так размер известен точно, а
+    изменение полученного объекта не портит кэш.
+    """
+
+    def __init__(self, max_bytes, metrics):
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires, payload = item
+            if expires is not None and expires <= time.monotonic():
+                self._pop(key)
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._pop(key)
+            if len(payload) > self.max_bytes:
+                return
+            self._data[key] = (expires, payload)
+            self.size += len(payload)
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.metrics.incr('evictions')
+
+    def delete(self, key):
+        with self._lock:
+            return self._pop(key)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        item = self._data.pop(key, None)
+        if item is None:
+            return False
+        self.size -= len(item[1])
+        return True
+
+
+class SingleFlight:
+    """Объединяет одновременные вычисления одного ключа в потоке процесса.
+
+    Первый поток вычисляет значение, остальные ждут его результат.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event()}
+        if not leader:
+            call['done'].wait()
+            if 'error' in call:
+                raise call['error']
+            return call['value'], False
+        try:
+            call['value'] = func()
+        except Exception as error:
+            call['error'] = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+        return call['value'], True
+
+
+# Уровни L1 и метрики живут на уровне модуля: Django создаёт экземпляр
+# бэкенда на каждый поток, а L1 должен быть общим для процесса.
+_stores = {}
+_flights = {}
+_metrics = {}
+_registry_lock = threading.Lock()
+
+
+class TwoLevelCache(BaseCache):
+    """Кэш из двух уровней: L1 в памяти процесса и общий L2.
+
+    L2 — другой кэш из CACHES (OPTIONS['L2'], Memcached, Redis или
+    файловый). Чтение сначала ищет ключ в L1, затем в L2 и кладёт
+    найденное в L1 не дольше чем на `L1_TIMEOUT` секунд: запись в другом
+    процессе обновляет только L2, поэтому L1 может отставать от неё на
+    это время. Запись и удаление идут в оба уровня.
+
+    `get_or_set` вычисляет отсутствующее значение один раз: внутри
+    процесса — через SingleFlight, между процессами — под блокировкой в
+    L2, пока остальные ждут готового значения.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', CACHE_L1_TIMEOUT)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', CACHE_LOCK_TIMEOUT)
+        name = location or 'default'
+        with _registry_lock:
+            if name not in _metrics:
+                _metrics[name] = CacheMetrics()
+                _stores[name] = LRUStore(
+                    options.get('L1_MAX_BYTES', CACHE_L1_MAX_BYTES),
+                    _metrics[name],
+                )
+                _flights[name] = SingleFlight()
+        self.metrics = _metrics[name]
+        self.l1 = _stores[name]
+        self._flight = _flights[name]
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _l1_timeout(self, timeout):
+        if timeout is None:
+            return self.l1_timeout
+        return max(min(timeout, self.l1_timeout), 0)
+
+    def get(self, key, default=None, version=None):
+        l1_key = self._key(key, version)
+        value = self.l1.get(l1_key)
+        if value is not _MISSING:
+            self.metrics.incr('l1_hits')
+            return value
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self.metrics.incr('misses')
+            return default
+        self.metrics.incr('l2_hits')
+        self.l1.set(l1_key, value, self.l1_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._l2_timeout(timeout)
+        self.l2.set(key, value, timeout, version=version)
+        self.l1.set(self._key(key, version), value, self._l1_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._l2_timeout(timeout)
+        l1_key = self._key(key, version)
+        if self.l2.add(key, value, timeout, version=version):
+            self.l1.set(l1_key, value, self._l1_timeout(timeout))
+            return True
+        self.l1.delete(l1_key)
+        return False
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l1.delete(self._key(key, version))
+        return self.l2.touch(key, self._l2_timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self.l1.delete(self._key(key, version))
+        return self.l2.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version=version)
+        self.l1.delete(self._key(key, version))
+        return value
+
+    def get_many(self, keys, version=None):
+        found, rest = {}, []
+        for key in keys:
+            value = self.l1.get(self._key(key, version))
+            if value is _MISSING:
+                rest.append(key)
+            else:
+                found[key] = value
+        self.metrics.incr('l1_hits', len(found))
+        if rest:
+            from_l2 = self.l2.get_many(rest, version=version)
+            self.metrics.incr('l2_hits', len(from_l2))
+            self.metrics.incr('misses', len(rest) - len(from_l2))
+            for key, value in from_l2.items():
+                self.l1.set(self._key(key, version), value, self.l1_timeout)
+            found.update(from_l2)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._l2_timeout(timeout)
+        failed = self.l2.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self.l1.set(
+                    self._key(key, version), value, self._l1_timeout(timeout)
+                )
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.l1.delete(self._key(key, version))
+        self.l2.delete_many(keys, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def _l2_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Возвращает значение ключа, вычисляя его не больше одного раза.
+
+        Одновременные промахи по ключу (например, по холодной странице
+        ленты) ждут значения, которое вычисляет первый из запросов.
+        """
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout, version=version)
+            return self.get(key, default, version=version)
+        value, leader = self._flight.do(
+            self._key(key, version),
+            lambda: self._compute(key, default, timeout, version),
+        )
+        if not leader:
+            self.metrics.incr('coalesced')
+        return value
+
+    def _compute(self, key, default, timeout, version):
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            if self.l2.add(lock_key, 1, self.lock_timeout, version=version):
+                try:
+                    return self._fill(key, default, timeout, version)
+                finally:
+                    self.l2.delete(lock_key, version=version)
+            # Значение вычисляет другой процесс — ждём его в L2.
+            value = self.l2.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self.metrics.incr('coalesced')
+                self.l1.set(self._key(key, version), value, self.l1_timeout)
+                return value
+            if time.monotonic() >= deadline:
+                # Процесс с блокировкой, видимо, завис — считаем сами.
+                return self._fill(key, default, timeout, version)
+            time.sleep(CACHE_LOCK_WAIT)
+
+    def _fill(self, key, default, timeout, version):
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            value = default()
+            self.set(key, value, timeout, version=version)
+        return value
+
+    def get_stats(self):
+        """Метрики кэша этого процесса и текущий размер L1."""
+        stats = self.metrics.snapshot()
+        stats['l1_bytes'] = self.l1.size
+        stats['l1_keys'] = len(self.l1)
+        return stats
+
+
+class LockedFileBasedCache(FileBasedCache):
+    """Файловый кэш с атомарными `add` и `incr`.
+
+    В FileBasedCache обе операции — отдельные чтение и запись. Здесь они
+    идут под flock на файле блокировки в каталоге кэша, поэтому на таком
+    кэше держатся блокировки и счётчики, общие для всех процессов одной
+    машины. Без fcntl (Windows) операции атомарны только внутри процесса.
+
+    `incr` сохраняет срок хранения ключа: в FileBasedCache он заново
+    записывает ключ со сроком по умолчанию, и бессрочный счётчик истекал
+    бы через TIMEOUT секунд. При достижении MAX_ENTRIES сначала удаляются
+    истёкшие записи и только затем — случайные.
+    """
+
+    lock_filename = 'cache.lock'
+    _thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            with self._thread_lock:
+                yield
+            return
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_filename), 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._locked():
+            try:
+                with open(fname, 'rb') as file:
+                    expiry = pickle.load(file)
+                    value = pickle.loads(zlib.decompress(file.read()))
+            except FileNotFoundError:
+                expiry, value = 0, _MISSING
+            if value is _MISSING or expiry is not None and (
+                expiry < time.time()
+            ):
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            self._replace(fname, expiry, value)
+        return value
+
+    def _replace(self, fname, expiry, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as file:
+                file.write(pickle.dumps(expiry, self.pickle_protocol))
+                file.write(
+                    zlib.compress(pickle.dumps(value, self.pickle_protocol))
+                )
+            os.replace(tmp_path, fname)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for fname in filelist:
+            try:
+                with open(fname, 'rb') as file:
+                    # _is_expired сам удаляет истёкший файл.
+                    self._is_expired(file)
+            except FileNotFoundError:
+                pass
+        super()._cull()
+
+
+class SharedCacheProxy:
+    """Кэш, общий для процессов, без уровня L1.
+
+    Для данных, которые процессы должны видеть без задержки: лимитов
+    запросов, сессий, сообщений брокера.
+    """
+
+    def __getattr__(self, name):
+        return getattr(caches[settings.SHARED_CACHE_ALIAS], name)
+
+
+shared_cache = SharedCacheProxy()
+
+
+@contextmanager
+def cache_lock(key, timeout=CACHE_LOCK_TIMEOUT, cache=shared_cache):
+    """Блокировка между процессами на ключе `key` общего кэша.
+
+    Держится через атомарный `add`, поэтому кэш должен его поддерживать
+    (Memcached, Redis, LockedFileBasedCache). Блокировка сама истекает
+    через `timeout` секунд, если её владелец завис; тогда ждавший
+    продолжает без неё.
+    """
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + timeout
+    acquired = cache.add(lock_key, 1, timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(CACHE_LOCK_WAIT)
+        acquired = cache.add(lock_key, 1, timeout)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(lock_key)
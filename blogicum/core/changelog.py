@@ -0,0 +1,60 @@
+import secrets
+
+from core.cache import shared_cache
+from core.constants import CHANGE_LOG_MAX_READ, CHANGE_LOG_TTL
+
+# Запись журнала, после которой читатели перестраивают свои данные целиком.
+REBUILD = None
+
+
+class ChangeLog:
+    """Журнал изменений в общем кэше для данных в памяти процессов.
+
+    Изменения нумеруются счётчиком, как сообщения core.pubsub.CacheBroker,
+    и хранятся `CHANGE_LOG_TTL` секунд. Процесс помнит номер последнего
+    применённого изменения и при следующем обращении дочитывает только
+    новые. Если часть записей уже истекла, процесс отстал больше чем на
+    `CHANGE_LOG_MAX_READ` записей или в журнале есть REBUILD, `read`
+    возвращает None: данные нужно перестроить по БД.
+
+    Счётчик начинается со случайного числа: если кэш очистили, новый
+    счётчик не совпадёт с номерами, которые помнят процессы.
+    """
+
+    def __init__(self, name, ttl=CHANGE_LOG_TTL, cache=shared_cache):
+        self.name = name
+        self.ttl = ttl
+        self.cache = cache
+        self.counter_key = f'changelog:{name}:last'
+
+    def _entry_key(self, number):
+        return f'changelog:{self.name}:{number}'
+
+    def last(self):
+        """Номер последнего изменения в журнале."""
+        last = self.cache.get(self.counter_key)
+        if last is None:
+            self.cache.add(self.counter_key, secrets.randbits(48), None)
+            last = self.cache.get(self.counter_key)
+        return last
+
+    def publish(self, change):
+        self.last()
+        number = self.cache.incr(self.counter_key)
+        self.cache.set(self._entry_key(number), change, self.ttl)
+        return number
+
+    def read(self, after, last):
+        """Изменения с номерами от `after + 1` до `last` или None."""
+        if not 0 <= last - after <= CHANGE_LOG_MAX_READ:
+            return None
+        keys = [
+            self._entry_key(number) for number in range(after + 1, last + 1)
+        ]
+        entries = self.cache.get_many(keys)
+        if len(entries) < len(keys):
+            return None
+        changes = [entries[key] for key in keys]
+        if REBUILD in changes:
+            return None
+        return changes
@@ -3,3 +3,43 @@ PAGINATOR: int = 10
 MAX_LENGTH_TEXT: int = 50
 MAX_LENGTH_FOR_POST_TEXT: int = 4096
 MAX_LENGTH_FOR_COMMENT: int = 1024
+PAGINATOR_ON_EACH_SIDE: int = 2  # Соседних с текущей страниц в пагинаторе
+PAGINATOR_ON_ENDS: int = 1
+ADMIN_EXACT_COUNT_LIMIT: int = 10000  # До скольки строк админка считает точно
+USER_CACHE_TIMEOUT: int = 60 * 15  # Время жизни кэша данных пользователя, с
+JOB_BATCH_SIZE: int = 50  # Сколько фоновых задач обработчик берёт за раз
+JOB_MAX_ATTEMPTS: int = 5
+JOB_RETRY_DELAY: int = 30  # Первая пауза перед повтором задачи, с
+JOB_LOCK_TIMEOUT: int = 60 * 10  # Когда задача считается зависшей, с
+THUMBNAIL_SIZE: tuple = (640, 640)  # Максимальный размер миниатюры, px
+COMMENT_DIGEST_DELAY: int = 60 * 15  # Окно сбора комментариев в письмо, с
+IMPORT_BATCH_SIZE: int = 1000  # Публикаций в одной транзакции импорта
+IMPORT_IMAGE_TIMEOUT: int = 10  # Таймаут загрузки картинки при импорте, с
+UPDATES_LIMIT: int = 50  # Публикаций в одном ответе ленты обновлений
+UPDATES_MAX_WAIT: int = 25  # Наибольшее ожидание новых публикаций, с
+UPDATES_POLL_INTERVAL: float = 1  # Как часто проверять отметку, с
+UPDATES_MARK_TIMEOUT: int = 60  # Наибольший возраст отметки в кэше, с
+SSE_KEEPALIVE: int = 15  # Пауза между keepalive в потоке событий, с
+PUBSUB_MESSAGE_TTL: int = 60 * 5  # Сколько сообщение брокера лежит в кэше, с
+PUBSUB_POLL_INTERVAL: float = 0.5  # Как часто брокер на кэше проверяет канал
+EXCERPT_WORDS: int = 10  # Слов текста в карточке публикации
+FEED_INDEX_RECONCILE_INTERVAL: int = 60 * 5  # Как часто сверять индекс лент, с
+CACHE_L1_MAX_BYTES: int = 16 * 1024 * 1024  # Размер L1 кэша процесса, байт
+CACHE_L1_TIMEOUT: int = 5  # Наибольшее отставание L1 от общего кэша, с
+CACHE_LOCK_TIMEOUT: int = 30  # Сколько ждать чужого вычисления ключа, с
+CACHE_LOCK_WAIT: float = 0.05  # Пауза между проверками готовности ключа, с
+RATELIMIT_LOCK_TIMEOUT: int = 1  # Наибольшее время блокировки корзины, с
+QUERY_CACHE_TIMEOUT: int = 60 * 5  # Время жизни кэша результатов запросов, с
+PAGE_CACHE_TIMEOUT: int = 60  # Время жизни кэша страниц, с
+EXISTENCE_ERROR_RATE: float = 0.01  # Доля ложных «есть» у фильтров Блума
+EXISTENCE_INDEX_MAX_AGE: int = 60 * 5  # Как часто перестраивать фильтры, с
+CHANGE_LOG_TTL: int = 60 * 10  # Сколько запись журнала изменений в кэше, с
+CHANGE_LOG_MAX_READ: int = 1000  # Больше новых записей — перестроить всё
+SURROGATE_MAX_AGE: int = 60 * 60 * 24  # Сколько прокси хранит страницу, с
+SURROGATE_UNPURGED_MAX_AGE: int = 60  # То же без очистки прокси, с
+SURROGATE_PURGE_BATCH: int = 256  # Ключей в одном запросе очистки прокси
+SURROGATE_PURGE_TIMEOUT: int = 10  # Таймаут запроса очистки прокси, с
+VIEW_FLUSH_BATCH: int = 500  # Публикаций в одном UPDATE счётчика просмотров
+VIEW_COUNT_CACHE_TIMEOUT: int = 60 * 5  # Кэш числа просмотров для показа, с
+COUNTERS_RECONCILE_INTERVAL: int = 60 * 30  # Как часто сверять счётчики, с
+COUNTERS_RECONCILE_BATCH: int = 1000  # Публикаций за один шаг сверки
@@ -0,0 +1,85 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedCounter:
+    """Счётчики в памяти процесса, которые пачкой сбрасываются в хранилище.
+
+    `incr` только увеличивает число в памяти — без запросов к БД.
+    `flush()` передаёт накопленные приращения функции `flush_func` одним
+    словарём `{ключ: приращение}` и обнуляет буфер; при ошибке
+    приращения возвращаются в буфер до следующей попытки. После
+    `start(interval)` сброс раз в `interval` секунд делает фоновый поток,
+    а остаток сбрасывается при завершении процесса.
+    """
+
+    def __init__(self, flush_func):
+        self.flush_func = flush_func
+        self.interval = None
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def incr(self, key, delta=1):
+        with self._lock:
+            self._counts[key] += delta
+
+    def pending(self, key):
+        """Приращение ключа, ещё не сброшенное в хранилище."""
+        with self._lock:
+            return self._counts.get(key, 0)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return
+            try:
+                self.flush_func(dict(counts))
+            except Exception:
+                with self._lock:
+                    self._counts.update(counts)
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def start(self, interval):
+        """Запускает фоновый сброс, если он ещё не запущен."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.interval = interval
+            self._thread = threading.Thread(
+                target=self._run, name='buffered-counter', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Не удалось сбросить счётчики.')
+            finally:
+                # Соединение с БД у потока своё: не держим его дольше
+                # CONN_MAX_AGE и не оставляем оборванным.
+                close_old_connections()
+
+    def stop(self):
+        """Останавливает фоновый поток и сбрасывает остаток."""
+        self._stop.set()
+        self.flush()
@@ -0,0 +1,15 @@
+from django.db import models
+from django.utils.safestring import mark_safe
+
+
+class RenderedHTMLField(models.TextField):
+    """HTML, заранее построенный из исходного текста при сохранении.
+
+    Значение из БД помечается безопасным, поэтому шаблоны выводят его
+    без экранирования и без повторной обработки.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return mark_safe(value)
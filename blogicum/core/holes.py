@@ -0,0 +1,155 @@
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.utils.cache import get_max_age
+from django.utils.safestring import mark_safe
+
+from core.constants import PAGE_CACHE_TIMEOUT
+from core.querycache import get_table_versions
+
+HOLE_SALT = 'core.holes'
+HOLE_PATTERN = re.compile(r'<!--hole:([\w:.-]+)-->')
+# Заголовки ответа, которые сохраняются в кэше вместе со страницей.
+CACHED_HEADERS = ('Content-Type', 'Surrogate-Key')
+
+_renderers = {}
+
+
+def register_hole(name):
+    """Регистрирует функцию, которая рисует персональный фрагмент страницы.
+
+    Функция получает запрос и именованные аргументы из шаблона и
+    возвращает HTML; аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        _renderers[name] = func
+        return func
+    return decorator
+
+
+def render_hole(request, name, kwargs):
+    """HTML фрагмента или, если страница кэшируется, его заглушка."""
+    if getattr(request, 'punch_holes', False):
+        token = signing.dumps([name, kwargs], salt=HOLE_SALT)
+        return mark_safe(f'<!--hole:{token}-->')
+    return mark_safe(_renderers[name](request, **kwargs))
+
+
+def fill_holes(content, request):
+    """Заменяет заглушки фрагментами для текущего пользователя."""
+    def fill(match):
+        try:
+            name, kwargs = signing.loads(match[1], salt=HOLE_SALT)
+        except signing.BadSignature:
+            return ''
+        return _renderers[name](request, **kwargs)
+    return HOLE_PATTERN.sub(fill, content)
+
+
+def is_cacheable(response):
+    """Можно ли положить ответ в общий кэш страниц."""
+    if response.status_code != 200 or response.cookies:
+        return False
+    if get_max_age(response) == 0:
+        return False
+    cache_control = response.get('Cache-Control', '')
+    return not any(
+        directive in cache_control
+        for directive in ('private', 'no-cache', 'no-store')
+    )
+
+
+class Uncacheable(Exception):
+    """Отрисованную страницу нельзя класть в кэш."""
+
+    def __init__(self, request, response):
+        super().__init__()
+        self.request = request
+        self.response = response
+
+
+def render_with_placeholders(view, request, *args, **kwargs):
+    """Рисует страницу с заглушками вместо персональных фрагментов."""
+    request.punch_holes = True
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+    finally:
+        request.punch_holes = False
+    return response
+
+
+def to_cache_entry(request, response):
+    """Текст страницы и сохраняемые заголовки или Uncacheable."""
+    if response.streaming or not is_cacheable(response):
+        raise Uncacheable(request, response)
+    headers = {
+        header: response[header]
+        for header in CACHED_HEADERS if response.has_header(header)
+    }
+    return response.content.decode(response.charset), headers
+
+
+def from_cache_entry(headers):
+    """Ответ для страницы из кэша; текст подставляется отдельно."""
+    response = HttpResponse()
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def cache_page_with_holes(tables, timeout=PAGE_CACHE_TIMEOUT, skip=None):
+    """Кэширует страницу целиком, кроме персональных фрагментов.
+
+    Фрагменты, размеченные в шаблоне тегом `{% hole %}`, сохраняются в
+    кэше заглушками и при каждом ответе рисуются заново для текущего
+    пользователя, поэтому вошедшие пользователи тоже получают страницу
+    из кэша. Кэш страницы сбрасывается при любой записи в таблицы
+    `tables` (см. core.querycache). Ответы с Cache-Control: private
+    и запросы, для которых `skip(request, *args, **kwargs)` истинно,
+    не кэшируются. Промах идёт через `cache.get_or_set`: одновременные
+    запросы холодной страницы ждут, пока её нарисует первый из них.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.PAGE_CACHE_ENABLED
+                    or request.method not in ('GET', 'HEAD')
+                    or (skip and skip(request, *args, **kwargs))):
+                return view(request, *args, **kwargs)
+            key = 'page:{}:{}'.format(
+                request.get_full_path(),
+                ':'.join(get_table_versions(DEFAULT_DB_ALIAS, tables)),
+            )
+            rendered = {}
+
+            def render():
+                response = rendered['response'] = render_with_placeholders(
+                    view, request, *args, **kwargs
+                )
+                return to_cache_entry(request, response)
+
+            try:
+                content, headers = cache.get_or_set(key, render, timeout)
+            except Uncacheable as error:
+                if error.request is not request:
+                    # Страницу рисовал другой запрос, и она не для кэша.
+                    return view(request, *args, **kwargs)
+                response = error.response
+                if response.streaming:
+                    return response
+                content = response.content.decode(response.charset)
+            else:
+                response = (
+                    rendered.get('response') or from_cache_entry(headers)
+                )
+            response.content = fill_holes(content, request)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,26 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+
+def render_plain(text: str) -> str:
+    """Экранирует текст и заменяет переводы строк на <br>."""
+    return linebreaksbr(text, autoescape=True)
+
+
+@lru_cache(maxsize=None)
+def get_renderer():
+    """Возвращает функцию разметки из настройки `MARKUP_RENDERER`."""
+    return import_string(settings.MARKUP_RENDERER)
+
+
+def render_markup(text: str) -> str:
+    """Превращает исходный текст в безопасный HTML для хранения в БД.
+
+    Рендерер должен сам экранировать или очищать HTML: результат
+    выводится в шаблонах без экранирования.
+    """
+    return mark_safe(get_renderer()(text))
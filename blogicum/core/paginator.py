@@ -0,0 +1,131 @@
+from django.core.paginator import Page, Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+from core.constants import PAGINATOR_ON_EACH_SIDE, PAGINATOR_ON_ENDS
+
+
+class FeedPage(Page):
+    """Страница ленты с укороченным списком номеров страниц."""
+
+    @cached_property
+    def elided_page_range(self):
+        return list(self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=self.paginator.on_each_side,
+            on_ends=self.paginator.on_ends,
+        ))
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор для больших лент.
+
+    Отдаёт в шаблон только первую, последнюю и соседние с текущей страницы.
+    Если задан `count_limit`, вместо точного COUNT(*) по всей таблице
+    считается не больше `count_limit` строк (или строк до текущей
+    страницы включительно, если она дальше) — так страница ленты
+    не зависит от размера таблицы.
+    """
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, count_limit=None,
+                 on_each_side=PAGINATOR_ON_EACH_SIDE,
+                 on_ends=PAGINATOR_ON_ENDS):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.count_limit = count_limit
+        self.on_each_side = on_each_side
+        self.on_ends = on_ends
+        self.count_is_estimate = False
+        self._count_window = count_limit
+
+    def expect_page(self, number):
+        """Расширяет окно подсчёта так, чтобы страница `number` была видна."""
+        if self.count_limit:
+            try:
+                requested = int(number)
+            except (TypeError, ValueError):
+                requested = 1
+            self._count_window = max(
+                self.count_limit, requested * self.per_page + 1
+            )
+
+    def get_page(self, number):
+        self.expect_page(number)
+        return super().get_page(number)
+
+    @cached_property
+    def count(self):
+        if not self.count_limit or not hasattr(self.object_list, 'query'):
+            return super().count
+        window = self._count_window
+        count = self.object_list[:window + 1].count()
+        if count > window:
+            self.count_is_estimate = True
+            return window
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+def estimate_count(queryset):
+    """Оценка числа строк в таблице модели по статистике СУБД.
+
+    Возвращает None, если статистика недоступна: для SQLite она появляется
+    после `ANALYZE`, для PostgreSQL поддерживается автоматически.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    queries = {
+        'postgresql': (
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+        ),
+        'mysql': (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        ),
+        'sqlite': 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+    }
+    sql = queries.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    try:
+        estimate = int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(FeedPaginator):
+    """Пагинатор для админки с приблизительным подсчётом строк.
+
+    Для списка без фильтров число строк берётся из статистики СУБД, если
+    таблица больше `count_limit`; для отфильтрованного списка считается
+    не больше `count_limit` строк. С `exact=True` считает точно.
+    """
+
+    def __init__(self, *args, exact=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.exact = exact
+
+    @cached_property
+    def count(self):
+        if self.exact or not hasattr(self.object_list, 'query'):
+            return Paginator.count.func(self)
+        if not self.object_list.query.where:
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate > self.count_limit:
+                self.count_is_estimate = True
+                return estimate
+        return super().count
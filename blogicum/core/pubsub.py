@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from core.constants import PUBSUB_MESSAGE_TTL, PUBSUB_POLL_INTERVAL
+
+
+class Broker(ABC):
+    """Публикация сообщений подписчикам канала.
+
+    `publish` вызывается из синхронного кода (сигналов, представлений),
+    `subscribe` — из асинхронного: это асинхронный контекстный менеджер,
+    который отдаёт асинхронный итератор сообщений канала.
+    """
+
+    @abstractmethod
+    def publish(self, channel, message):
+        """Отправляет сообщение подписчикам канала."""
+
+    @abstractmethod
+    def subscribe(self, channel):
+        """Подписка на канал (асинхронный контекстный менеджер)."""
+
+
+class InProcessBroker(Broker):
+    """Брокер в памяти процесса.
+
+    Подходит для одного процесса сервера и для тестов: сообщения
+    получают только подписчики того же процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            yield self._iterate(subscriber[1])
+        finally:
+            with self._lock:
+                channel_subscribers = self._subscribers.get(channel, set())
+                channel_subscribers.discard(subscriber)
+                if not channel_subscribers:
+                    self._subscribers.pop(channel, None)
+
+    @staticmethod
+    async def _iterate(queue):
+        while True:
+            yield await queue.get()
+
+
+class CacheBroker(Broker):
+    """Брокер поверх общего кэша для нескольких процессов.
+
+    Сообщения канала нумеруются счётчиком в кэше и хранятся
+    `PUBSUB_MESSAGE_TTL` секунд; подписчики опрашивают счётчик раз в
+    `PUBSUB_POLL_INTERVAL` секунд. Нужен кэш, общий для процессов
+    (Redis, Memcached). Обращения подписчиков к кэшу блокирующие, поэтому
+    идут через `sync_to_async`, а не в цикле событий.
+    """
+
+    def __init__(self, alias=None, poll_interval=PUBSUB_POLL_INTERVAL):
+        self.cache = caches[alias or settings.SHARED_CACHE_ALIAS]
+        self.poll_interval = poll_interval
+
+    def _counter_key(self, channel):
+        return f'pubsub:{channel}:last'
+
+    def _message_key(self, channel, number):
+        return f'pubsub:{channel}:{number}'
+
+    def _last_number(self, channel):
+        return self.cache.get(self._counter_key(channel), 0)
+
+    def publish(self, channel, message):
+        key = self._counter_key(channel)
+        self.cache.add(key, 0, None)
+        number = self.cache.incr(key)
+        self.cache.set(
+            self._message_key(channel, number), message, PUBSUB_MESSAGE_TTL
+        )
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        last = await sync_to_async(self._last_number)(channel)
+        yield self._iterate(channel, last)
+
+    async def _iterate(self, channel, last):
+        while True:
+            current = await sync_to_async(self._last_number)(channel)
+            if current > last:
+                keys = [
+                    self._message_key(channel, number)
+                    for number in range(last + 1, current + 1)
+                ]
+                messages = await sync_to_async(self.cache.get_many)(keys)
+                for key in keys:
+                    if key in messages:
+                        yield messages[key]
+                last = current
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Возвращает брокер, заданный настройкой `PUBSUB_BROKER`."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUBSUB_BROKER)()
+    return _broker
+
+
+def publish(channel, message):
+    get_broker().publish(channel, message)
@@ -0,0 +1,158 @@
+import hashlib
+import pickle
+import re
+from functools import lru_cache
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.sql import Query
+from django.db.models.sql.constants import MULTI, SINGLE
+
+from core.cache import shared_cache
+from core.constants import QUERY_CACHE_TIMEOUT
+
+_MISSING = object()
+
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+[`"]?(\w+)[`"]?', re.IGNORECASE)
+WRITE_TABLE = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)'
+    r'\s+[`"]?(\w+)[`"]?',
+    re.IGNORECASE,
+)
+
+
+def get_version_key(alias, table):
+    return f'querycache:{alias}:{table}'
+
+
+def get_table_versions(alias, tables):
+    """Версии таблиц из общего кэша; недостающие создаются."""
+    keys = {get_version_key(alias, table): table for table in tables}
+    versions = shared_cache.get_many(list(keys))
+    for key in keys.keys() - versions.keys():
+        shared_cache.add(key, uuid4().hex, None)
+        versions[key] = shared_cache.get(key)
+    return [versions[key] for key in sorted(keys)]
+
+
+def bump_tables(alias, tables):
+    shared_cache.set_many(
+        {get_version_key(alias, table): uuid4().hex for table in tables},
+        None,
+    )
+
+
+def tables_changed(alias, tables):
+    """Сбрасывает кэш запросов к таблицам `tables`.
+
+    Внутри транзакции версии меняются ещё раз после фиксации: иначе
+    другой процесс мог бы успеть закэшировать данные до неё.
+    """
+    bump_tables(alias, tables)
+    connection = connections[alias]
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: bump_tables(alias, tables), using=alias)
+
+
+def invalidate_on_write(execute, sql, params, many, context):
+    """Обёртка выполнения SQL: запись в таблицу сбрасывает её кэш.
+
+    Ловит любые INSERT, UPDATE и DELETE, в том числе `update()`,
+    `bulk_create()` и каскадное удаление, которые не отправляют сигналов.
+    """
+    match = WRITE_TABLE.match(sql)
+    result = execute(sql, params, many, context)
+    if match:
+        tables_changed(context['connection'].alias, {match[1]})
+    return result
+
+
+def install(connection, **kwargs):
+    if invalidate_on_write not in connection.execute_wrappers:
+        connection.execute_wrappers.append(invalidate_on_write)
+
+
+def connect_signals():
+    connection_created.connect(install)
+    for connection in connections.all():
+        install(connection)
+
+
+class CachingCompilerMixin:
+    """Берёт строки результата SELECT из кэша.
+
+    Кэшируются сырые строки из БД, поэтому модели, select_related и
+    вычисляемые поля собираются как обычно. Ключ состоит из текста SQL,
+    параметров и версий всех таблиц из FROM и JOIN. Внутри транзакции
+    кэш не используется: её незафиксированные данные не должны попасть
+    к другим запросам.
+    """
+
+    def execute_sql(self, result_type=MULTI, *args, **kwargs):
+        if (result_type not in (MULTI, SINGLE)
+                or self.connection.in_atomic_block):
+            return super().execute_sql(result_type, *args, **kwargs)
+        try:
+            sql, params = self.as_sql()
+        except Exception:
+            return super().execute_sql(result_type, *args, **kwargs)
+        alias = self.connection.alias
+        tables = set(READ_TABLES.findall(sql))
+        fingerprint = hashlib.sha1(pickle.dumps(
+            (sql, tuple(params), result_type,
+             get_table_versions(alias, tables))
+        )).hexdigest()
+        key = f'querycache:{alias}:result:{fingerprint}'
+        rows = cache.get(key, _MISSING)
+        if rows is _MISSING:
+            rows = super().execute_sql(result_type, chunked_fetch=False)
+            if result_type == MULTI:
+                rows = [list(chunk) for chunk in rows]
+            cache.set(key, rows, self.query.cache_timeout)
+        if result_type == MULTI:
+            return iter(rows)
+        return rows
+
+
+@lru_cache(maxsize=None)
+def get_caching_compiler(compiler_class):
+    return type(
+        f'Caching{compiler_class.__name__}',
+        (CachingCompilerMixin, compiler_class),
+        {},
+    )
+
+
+class CachedQuery(Query):
+    """Query, чей SELECT читается из кэша результатов."""
+
+    cache_timeout = QUERY_CACHE_TIMEOUT
+
+    def get_compiler(self, using=None, connection=None):
+        compiler = super().get_compiler(using, connection)
+        if compiler.__class__.__name__ == 'SQLCompiler':
+            compiler.__class__ = get_caching_compiler(compiler.__class__)
+        return compiler
+
+
+class CachedQuerySetMixin:
+    """Добавляет к QuerySet метод `cached()`."""
+
+    def cached(self, timeout=QUERY_CACHE_TIMEOUT):
+        """Читает результат запроса из кэша, пока таблицы не менялись.
+
+        Любая запись через ORM в одну из таблиц запроса сбрасывает кэш.
+        Запросы со временем в параметрах (например, `pub_date <= now`)
+        кэшировать бессмысленно: ключ у них каждый раз новый.
+        """
+        clone = self._chain()
+        clone.query = clone.query.chain(CachedQuery)
+        clone.query.cache_timeout = timeout
+        return clone
+
+
+class CachedQuerySet(CachedQuerySetMixin, QuerySet):
+    pass
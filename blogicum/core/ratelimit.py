@@ -0,0 +1,103 @@
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from core.cache import cache_lock, shared_cache
+from core.constants import RATELIMIT_LOCK_TIMEOUT
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): не больше 10 запросов за 60 секунд."""
+    count, period = rate.split('/')
+    return int(count), RATE_PERIODS[period[0]]
+
+
+class TokenBucket:
+    """Корзина токенов, хранящаяся в общем кэше.
+
+    Корзина вмещает `capacity` токенов и пополняется равномерно: за
+    `period` секунд — на `capacity` токенов. Каждый запрос забирает один.
+    `rate` — строка вида '10/m' или пара `(capacity, period)`.
+    Чтение и запись корзины идут под блокировкой в общем кэше, чтобы
+    одновременные запросы из разных процессов не забрали один токен.
+    """
+
+    def __init__(self, key, rate):
+        self.key = f'ratelimit:{key}'
+        self.capacity, self.period = (
+            parse_rate(rate) if isinstance(rate, str) else rate
+        )
+
+    def take(self, now=None):
+        """Забирает токен; возвращает 0 или сколько секунд ждать токена."""
+        with cache_lock(self.key, RATELIMIT_LOCK_TIMEOUT):
+            now = time.time() if now is None else now
+            refill = self.capacity / self.period
+            tokens, updated = shared_cache.get(self.key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * refill)
+            if tokens < 1:
+                shared_cache.set(self.key, (tokens, now), self.period)
+                return (1 - tokens) / refill
+            shared_cache.set(self.key, (tokens - 1, now), self.period)
+            return 0
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_rate_limits(request, scope):
+    """Проверяет лимиты `scope` по IP и пользователю без запросов к БД.
+
+    Пользователь определяется по сессии, а не через `request.user`,
+    чтобы не загружать его из БД. Возвращает ответ 429 или None.
+    """
+    if not settings.RATELIMIT_ENABLED or request.method != 'POST':
+        return None
+    limits = settings.RATELIMITS.get(scope, {})
+    keys = []
+    if 'ip' in limits:
+        keys.append((f'{scope}:ip:{get_client_ip(request)}', limits['ip']))
+    user_id = request.session.get(SESSION_KEY)
+    if 'user' in limits and user_id is not None:
+        keys.append((f'{scope}:user:{user_id}', limits['user']))
+    for key, rate in keys:
+        retry_after = TokenBucket(key, rate).take()
+        if retry_after:
+            response = HttpResponse(
+                render_to_string('pages/429.html'), status=429
+            )
+            response['Retry-After'] = str(int(retry_after) + 1)
+            return response
+    return None
+
+
+def ratelimit(scope):
+    """Декоратор view-функции: лимит записей по IP и пользователю."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = check_rate_limits(request, scope)
+            if response is not None:
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMixin:
+    """Лимит записей для классов-представлений; ставится первым в MRO."""
+
+    ratelimit_scope = None
+
+    def dispatch(self, request, *args, **kwargs):
+        response = check_rate_limits(request, self.ratelimit_scope)
+        if response is not None:
+            return response
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,82 @@
+import json
+from functools import wraps
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from core.constants import (SURROGATE_MAX_AGE, SURROGATE_PURGE_BATCH,
+                            SURROGATE_PURGE_TIMEOUT,
+                            SURROGATE_UNPURGED_MAX_AGE)
+
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+
+
+def add_surrogate_keys(response, keys):
+    """Добавляет ключи к заголовку Surrogate-Key ответа."""
+    existing = response.get(SURROGATE_KEY_HEADER, '').split()
+    response[SURROGATE_KEY_HEADER] = ' '.join(
+        dict.fromkeys([*existing, *keys])
+    )
+    return response
+
+
+def edge_cache(max_age=SURROGATE_MAX_AGE):
+    """Разрешает обратному прокси кэшировать ответ представления.
+
+    Успешный ответ анонимному пользователю без cookie получает
+    `Cache-Control: public, max-age=0, s-maxage=<max_age>`: браузер
+    каждый раз спрашивает прокси, а прокси хранит страницу, пока её не
+    очистят по ключам из Surrogate-Key (см. `purge_surrogate_keys`).
+    `max_age` может быть функцией от запроса. Если `SURROGATE_PURGE_URL`
+    не задан, очищать прокси некому, и срок не превышает
+    `SURROGATE_UNPURGED_MAX_AGE`. Остальные ответы помечаются как private.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            if (response.status_code != 200 or response.cookies
+                    or request.user.is_authenticated
+                    or 'private' in response.get('Cache-Control', '')):
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+            seconds = max_age(request) if callable(max_age) else max_age
+            if not settings.SURROGATE_PURGE_URL:
+                seconds = min(seconds, SURROGATE_UNPURGED_MAX_AGE)
+            patch_cache_control(
+                response, public=True, max_age=0, s_maxage=seconds
+            )
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_surrogate_keys(keys):
+    """Очищает кэш прокси по ключам.
+
+    Ключи отправляются POST-запросом на `SURROGATE_PURGE_URL` пачками по
+    `SURROGATE_PURGE_BATCH`: в JSON-теле `{"surrogate_keys": [...]}` и в
+    заголовке Surrogate-Key. Дополнительные заголовки (например, токен
+    доступа) задаются в `SURROGATE_PURGE_HEADERS`. Ошибка HTTP поднимает
+    исключение, и фоновая задача повторяется.
+    """
+    url = settings.SURROGATE_PURGE_URL
+    keys = sorted(set(keys))
+    if not url or not keys:
+        return
+    for start in range(0, len(keys), SURROGATE_PURGE_BATCH):
+        chunk = keys[start:start + SURROGATE_PURGE_BATCH]
+        request = Request(
+            url,
+            data=json.dumps({'surrogate_keys': chunk}).encode(),
+            method='POST',
+            headers={
+                'Content-Type': 'application/json',
+                SURROGATE_KEY_HEADER: ' '.join(chunk),
+                **settings.SURROGATE_PURGE_HEADERS,
+            },
+        )
+        with urlopen(request, timeout=SURROGATE_PURGE_TIMEOUT) as response:
+            response.read()
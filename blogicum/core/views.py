@@ -1,10 +1,35 @@
+from django.http import HttpResponseNotFound
 from django.shortcuts import render
+from django.template.loader import render_to_string
+
+from core.holes import fill_holes
+
+_not_found_page = None
 
 
 def page_not_found(request, exception):
     return render(request, 'pages/404.html', status=404)
 
 
+def not_found(request):
+    """Ответ 404 из заранее отрисованной страницы.
+
+    Страница рендерится один раз на процесс с заглушками вместо шапки и
+    адреса запроса (см. core.holes); дальше в неё подставляются только
+    они. Для ответов на перебор несуществующих адресов.
+    """
+    global _not_found_page
+    if _not_found_page is None:
+        request.punch_holes = True
+        try:
+            _not_found_page = render_to_string(
+                'pages/404.html', request=request
+            )
+        finally:
+            request.punch_holes = False
+    return HttpResponseNotFound(fill_holes(_not_found_page, request))
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'pages/403csrf.html', status=403)
 
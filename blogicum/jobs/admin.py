@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'locked_by',
+        'created_at',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'created_at')
+    actions = ('retry_jobs',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.update(
+            status=Job.PENDING, attempts=0, locked_by='', locked_at=None
+        )
+        self.message_user(request, f'Возвращено в очередь: {updated}.')
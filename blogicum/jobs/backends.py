@@ -0,0 +1,20 @@
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .mail import serialize_message
+from .queue import enqueue
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который откладывает отправку в фоновую задачу.
+
+    Письма доставляет обработчик очереди через `JOBS_EMAIL_BACKEND`.
+    """
+
+    def send_messages(self, email_messages):
+        count = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            enqueue('jobs.send_email', serialize_message(message))
+            count += 1
+        return count
@@ -0,0 +1,16 @@
+from .mail import DeliveryError, EmailDispatcher, deserialize_message
+from .queue import PartialFailure, job
+
+
+@job('jobs.send_email', batch=True)
+def send_email(payloads):
+    """Отправляет все взятые из очереди письма одной пачкой.
+
+    Повторяются только неотправленные письма: остальные уже доставлены.
+    """
+    try:
+        EmailDispatcher().send(
+            deserialize_message(payload) for payload in payloads
+        )
+    except DeliveryError as error:
+        raise PartialFailure(error.failed, error.error) from error
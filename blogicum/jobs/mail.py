@@ -0,0 +1,101 @@
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.mail import get_connection
+
+from core.ratelimit import TokenBucket
+
+# Корзина лимита EMAIL_RATE_LIMIT в общем кэше, одна на все процессы.
+EMAIL_RATE_KEY = 'jobs:email'
+
+
+def serialize_message(message: EmailMessage) -> dict:
+    """Переводит письмо в словарь для параметров фоновой задачи.
+
+    Вложения не переносятся: письма проекта их не содержат.
+    """
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': list(message.to),
+        'cc': list(message.cc),
+        'bcc': list(message.bcc),
+        'reply_to': list(message.reply_to),
+        'headers': dict(message.extra_headers),
+        'alternatives': [
+            list(alternative)
+            for alternative in getattr(message, 'alternatives', ())
+        ],
+    }
+
+
+def deserialize_message(data: dict, connection=None) -> EmailMessage:
+    data = dict(data)
+    alternatives = [tuple(item) for item in data.pop('alternatives', ())]
+    return EmailMultiAlternatives(
+        connection=connection, alternatives=alternatives, **data
+    )
+
+
+def get_delivery_connection(**kwargs):
+    """Соединение бэкенда, который действительно доставляет письма."""
+    return get_connection(settings.JOBS_EMAIL_BACKEND, **kwargs)
+
+
+class DeliveryError(Exception):
+    """Часть писем пачки не отправлена.
+
+    `failed` — номера неотправленных писем, `error` — последняя ошибка.
+    """
+
+    def __init__(self, failed, error):
+        super().__init__(f'Не отправлено писем: {len(failed)}. {error}')
+        self.failed = failed
+        self.error = error
+
+
+class EmailDispatcher:
+    """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    `rate` — не больше стольких писем в секунду (None — без ограничения)
+    на все обработчики очереди сразу: разрешения на отправку берутся из
+    корзины токенов в общем кэше. Соединение открывается один раз на
+    пачку, поэтому SMTP-бэкенд не устанавливает новое соединение на
+    каждое письмо. Письма отправляются по одному: ошибка одного не мешает
+    остальным, а номера неотправленных сообщает DeliveryError, чтобы
+    повторить только их.
+    """
+
+    def __init__(self, connection=None, rate=None):
+        self.connection = connection or get_delivery_connection()
+        self.rate = settings.EMAIL_RATE_LIMIT if rate is None else rate
+
+    def wait_for_slot(self):
+        if not self.rate:
+            return
+        # Без запаса: письма уходят равномерно, раз в 1 / rate секунд.
+        bucket = TokenBucket(EMAIL_RATE_KEY, (1, 1 / self.rate))
+        wait = bucket.take()
+        while wait:
+            time.sleep(wait)
+            wait = bucket.take()
+
+    def send(self, messages):
+        """Отправляет письма, возвращает число отправленных."""
+        messages = list(messages)
+        if not messages:
+            return 0
+        sent, failed, error = 0, [], None
+        with self.connection as connection:
+            for number, message in enumerate(messages):
+                self.wait_for_slot()
+                try:
+                    sent += connection.send_messages([message]) or 0
+                except Exception as message_error:
+                    failed.append(number)
+                    error = message_error
+        if failed:
+            raise DeliveryError(failed, error)
+        return sent
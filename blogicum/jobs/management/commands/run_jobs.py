@@ -0,0 +1,54 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.constants import JOB_BATCH_SIZE
+from jobs.worker import Worker
+
+
+def run_worker(batch_size, poll_interval, once):
+    Worker(batch_size=batch_size).run(poll_interval=poll_interval, once=once)
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчики очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=JOB_BATCH_SIZE,
+            help='Сколько задач процесс берёт за раз.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза между проверками пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и выйти.',
+        )
+
+    def handle(self, *args, processes, batch_size, poll_interval, once,
+               **options):
+        worker_args = (batch_size, poll_interval, once)
+        if processes <= 1:
+            run_worker(*worker_args)
+            return
+        # Дочерние процессы открывают свои соединения с БД.
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=run_worker, args=worker_args)
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='key',
+            field=models.CharField(blank=True, help_text='В очереди может ждать только одна задача с этим ключом.', max_length=256, verbose_name='Ключ'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending'), models.Q(('key', ''), _negated=True)), fields=('key',), name='job_unique_pending_key'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import models
+from django.utils import timezone
+
+from core.constants import MAX_LENGTH
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=MAX_LENGTH)
+    payload = models.JSONField('Параметры', default=dict, blank=True)
+    key = models.CharField(
+        'Ключ',
+        max_length=MAX_LENGTH,
+        blank=True,
+        help_text='В очереди может ждать только одна задача с этим ключом.')
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_by = models.CharField('Обработчик', max_length=64, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='job_status_run_at_idx'
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('key',),
+                condition=models.Q(status='pending') & ~models.Q(key=''),
+                name='job_unique_pending_key'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.constants import JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY
+
+from .models import Job
+
+
+class PartialFailure(Exception):
+    """Пакетный обработчик выполнил не все задачи.
+
+    `failed` — номера параметров в переданном обработчику списке, задачи
+    которых нужно повторить; остальные задачи считаются выполненными.
+    """
+
+    def __init__(self, failed, error):
+        super().__init__(str(error))
+        self.failed = list(failed)
+        self.error = error
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    name: str
+    func: Callable
+    batch: bool
+    max_attempts: int
+    retry_delay: int
+    every: Optional[int] = None
+
+
+registry: Dict[str, JobSpec] = {}
+
+
+def job(name: str, *, batch: bool = False,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        retry_delay: int = JOB_RETRY_DELAY,
+        every: Optional[int] = None):
+    """Регистрирует обработчик фоновой задачи.
+
+    Обычный обработчик получает параметры одной задачи, пакетный
+    (`batch=True`) — список параметров всех взятых за раз задач с этим
+    именем; если часть из них не выполнена, он бросает PartialFailure.
+    Задачу с `every` обработчики очереди запускают сами раз в
+    `every` секунд (см. `schedule_periodic`). Обработчики ищутся в модулях
+    `jobs.py` установленных приложений.
+    """
+    def decorator(func):
+        registry[name] = JobSpec(
+            name, func, batch, max_attempts, retry_delay, every
+        )
+        return func
+    return decorator
+
+
+def get_spec(name: str) -> JobSpec:
+    try:
+        return registry[name]
+    except KeyError:
+        raise LookupError(f'Обработчик задачи {name!r} не зарегистрирован.')
+
+
+def enqueue(name: str, payload: Optional[dict] = None, *,
+            delay: int = 0, key: str = '') -> Optional[Job]:
+    """Ставит задачу в очередь.
+
+    Задача сохраняется в той же транзакции, что и данные, поэтому
+    обработчик увидит её только после фиксации. Если задан `key` и задача
+    с таким ключом уже ждёт в очереди, новая не создаётся — так события
+    объединяются в одну задачу. С `JOBS_ALWAYS_EAGER` задача выполняется
+    сразу после фиксации транзакции, без очереди.
+    """
+    spec = get_spec(name)
+    payload = payload or {}
+    if settings.JOBS_ALWAYS_EAGER:
+        transaction.on_commit(
+            lambda: spec.func([payload] if spec.batch else payload)
+        )
+        return None
+    job = Job(
+        name=name,
+        payload=payload,
+        key=key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if not key:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def schedule_periodic(spec: JobSpec, delay: int = 0) -> Optional[Job]:
+    """Ставит следующий запуск периодической задачи.
+
+    Ключом служит имя задачи, поэтому обработчики, запущенные в
+    нескольких процессах, не создают лишних запусков.
+    """
+    return enqueue(spec.name, delay=delay, key=spec.name)
@@ -0,0 +1,111 @@
+import socketserver
+import threading
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный диалог SMTP: HELO/EHLO, MAIL, RCPT, DATA, RSET, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections += 1
+        self.sender, self.recipients = None, []
+        self.reply('220 localhost ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+            handler = getattr(self, f'smtp_{verb.lower()}', None)
+            if handler is None:
+                self.reply('502 Command not implemented')
+            elif handler(command) is False:
+                return
+
+    def smtp_helo(self, command):
+        self.reply('250 localhost')
+
+    def smtp_ehlo(self, command):
+        self.reply('250-localhost')
+        self.reply('250 8BITMIME')
+
+    def smtp_mail(self, command):
+        self.sender = command.split(':', 1)[1].strip()
+        self.recipients = []
+        self.reply('250 OK')
+
+    def smtp_rcpt(self, command):
+        recipient = command.split(':', 1)[1].strip()
+        if recipient.strip('<>') in self.server.rejected:
+            self.reply('550 No such user')
+            return
+        self.recipients.append(recipient)
+        self.reply('250 OK')
+
+    def smtp_data(self, command):
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if line in (b'.\r\n', b'.\n', b''):
+                break
+            if line.startswith(b'..'):
+                line = line[1:]
+            lines.append(line)
+        with self.server.lock:
+            self.server.messages.append({
+                'from': self.sender,
+                'to': self.recipients,
+                'message': message_from_bytes(b''.join(lines)),
+            })
+        self.reply('250 OK')
+
+    def smtp_rset(self, command):
+        self.sender, self.recipients = None, []
+        self.reply('250 OK')
+
+    def smtp_noop(self, command):
+        self.reply('250 OK')
+
+    def smtp_quit(self, command):
+        self.reply('221 Bye')
+        return False
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Локальный SMTP-сервер для тестов и разработки.
+
+    Принимает письма и складывает их в `messages`, считает соединения
+    в `connections`, отклоняет адреса из `rejected`. Запуск в фоне:
+    `with LocalSMTPServer() as server:`; порт — `server.port`.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.rejected = set()
+        self.connections = 0
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
@@ -0,0 +1,138 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.constants import JOB_BATCH_SIZE, JOB_LOCK_TIMEOUT
+
+from .models import Job
+from .queue import PartialFailure, get_spec, registry, schedule_periodic
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Обработчик очереди задач.
+
+    Задачи забираются пачкой одним UPDATE с условием на статус, поэтому
+    несколько процессов не возьмут одну задачу дважды. Задачи, зависшие
+    у упавшего процесса дольше `JOB_LOCK_TIMEOUT` секунд, возвращаются
+    в работу. Периодические задачи обработчик ставит в очередь при
+    запуске и после каждого их выполнения.
+    """
+
+    def __init__(self, name=None, batch_size=JOB_BATCH_SIZE):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size = batch_size
+
+    def claim(self):
+        now = timezone.now()
+        stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+        available = Q(status=Job.PENDING, run_at__lte=now) | Q(
+            status=Job.RUNNING, locked_at__lt=stale
+        )
+        ids = list(
+            Job.objects.filter(available).order_by('run_at', 'id')
+            .values_list('id', flat=True)[:self.batch_size]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(available, id__in=ids).update(
+            status=Job.RUNNING, locked_by=self.name, locked_at=now
+        )
+        return list(Job.objects.filter(
+            id__in=ids, status=Job.RUNNING, locked_by=self.name,
+            locked_at=now,
+        ))
+
+    def run_once(self):
+        """Выполняет одну пачку задач, возвращает число взятых задач."""
+        jobs = self.claim()
+        groups = defaultdict(list)
+        for job in jobs:
+            groups[job.name].append(job)
+        for name, group in groups.items():
+            self.process(name, group)
+        return len(jobs)
+
+    def process(self, name, jobs):
+        try:
+            spec = get_spec(name)
+        except LookupError as error:
+            self.fail(jobs, error, max_attempts=0, retry_delay=0)
+            return
+        if spec.batch:
+            calls = [(jobs, [job.payload for job in jobs])]
+        else:
+            calls = [([job], job.payload) for job in jobs]
+        for call_jobs, argument in calls:
+            try:
+                spec.func(argument)
+            except PartialFailure as failure:
+                logger.error('Задача %s выполнена не полностью: %s',
+                             name, failure.error)
+                failed = [call_jobs[number] for number in failure.failed]
+                self.complete(
+                    [job for job in call_jobs if job not in failed]
+                )
+                self.fail(failed, failure.error, spec.max_attempts,
+                          spec.retry_delay)
+            except Exception as error:
+                logger.exception('Задача %s завершилась с ошибкой', name)
+                self.fail(call_jobs, error, spec.max_attempts,
+                          spec.retry_delay)
+            else:
+                self.complete(call_jobs)
+        if spec.every:
+            schedule_periodic(spec, delay=spec.every)
+
+    def complete(self, jobs):
+        Job.objects.filter(id__in=[job.id for job in jobs]).delete()
+
+    def fail(self, jobs, error, max_attempts, retry_delay):
+        message = ''.join(traceback.format_exception_only(
+            type(error), error
+        ))
+        now = timezone.now()
+        for job in jobs:
+            job.attempts += 1
+            job.last_error = message
+            job.locked_by = ''
+            job.locked_at = None
+            if job.attempts >= max_attempts:
+                job.status = Job.FAILED
+            else:
+                # Пока задача выполнялась, в очередь могла встать новая
+                # с тем же ключом: повтор ключ не занимает.
+                job.key = ''
+                job.status = Job.PENDING
+                job.run_at = now + timedelta(
+                    seconds=retry_delay * 2 ** (job.attempts - 1)
+                )
+        Job.objects.bulk_update(jobs, (
+            'attempts', 'last_error', 'locked_by', 'locked_at', 'status',
+            'run_at', 'key',
+        ))
+
+    def run(self, poll_interval=1.0, once=False):
+        """Обрабатывает очередь, пока не будет остановлен.
+
+        С `once=True` выходит, как только очередь опустеет.
+        """
+        for spec in registry.values():
+            if spec.every:
+                schedule_periodic(spec)
+        while True:
+            close_old_connections()
+            if self.run_once():
+                continue
+            if once:
+                return
+            time.sleep(poll_interval)
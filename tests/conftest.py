@@ -9,7 +9,9 @@ from typing import (Any, Iterable, List, NamedTuple, Optional, Tuple, Type,
 
 import pytest
 from django.apps import apps
+from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Field, Model
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -26,12 +28,38 @@ UrlRepr = NamedTuple("UrlRepr", [("url", str), ("repr", str)])
 TitledUrlRepr = TypeVar("TitledUrlRepr", bound=Tuple[UrlRepr, str])
 
 
+@pytest.fixture(scope="session", autouse=True)
+def use_locmem_shared_cache():
+    # Файловый 'shared' из настроек пережил бы тестовую сессию.
+    caches = {**django_settings.CACHES, django_settings.SHARED_CACHE_ALIAS: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "blogicum-shared-tests",
+    }}
+    with override_settings(CACHES=caches):
+        yield
+
+
 @pytest.fixture(autouse=True)
 def enable_debug_false():
     with override_settings(DEBUG=False):
         yield
 
 
+@pytest.fixture(autouse=True)
+def disable_view_counts_flush(settings):
+    # Фоновый поток писал бы в тестовую БД из другого соединения.
+    settings.VIEW_COUNTS_FLUSH_INTERVAL = None
+    yield
+    from blog.viewcounts import view_counter
+    view_counter.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
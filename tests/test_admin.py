@@ -0,0 +1,233 @@
+import pytest
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+from core.paginator import estimate_count
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def many_posts(mixer, user, published_category):
+    return mixer.cycle(20).blend(
+        "blog.Post", author=user, category=published_category
+    )
+
+
+@pytest.fixture
+def analyzed_db(many_posts):
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def test_estimate_count_uses_db_statistics(analyzed_db):
+    assert estimate_count(Post.objects.all()) == 20
+
+
+def test_post_changelist_shows_estimated_count(
+        admin_client, analyzed_db, monkeypatch
+):
+    monkeypatch.setattr("blog.admin.ADMIN_EXACT_COUNT_LIMIT", 5)
+    response = admin_client.get("/admin/blog/post/")
+    assert response.status_code == 200
+    paginator = response.context["cl"].paginator
+    assert paginator.count_is_estimate, (
+        "Убедитесь, что на больших таблицах список публикаций в админке"
+        " использует оценку числа строк вместо точного COUNT(*)."
+    )
+    assert "показать точное количество" in response.content.decode("utf-8")
+
+    response = admin_client.get("/admin/blog/post/?exact_count=1")
+    assert response.status_code == 200
+    paginator = response.context["cl"].paginator
+    assert not paginator.count_is_estimate
+    assert paginator.count == 20
+
+
+def test_filtered_changelist_caps_count(
+        admin_client, many_posts, monkeypatch
+):
+    monkeypatch.setattr("blog.admin.ADMIN_EXACT_COUNT_LIMIT", 5)
+    monkeypatch.setattr("blog.admin.PostAdmin.list_per_page", 2)
+    category = many_posts[0].category
+    response = admin_client.get(
+        f"/admin/blog/post/?category__id__exact={category.id}"
+    )
+    assert response.status_code == 200
+    paginator = response.context["cl"].paginator
+    assert paginator.count_is_estimate
+    assert paginator.count == 5
+
+
+def test_post_changelist_queries_do_not_grow_with_rows(
+        admin_client, mixer, user, published_category
+):
+    def count_queries():
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get("/admin/blog/post/")
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    mixer.cycle(2).blend("blog.Post", author=user, category=published_category)
+    queries_for_few = count_queries()
+    mixer.cycle(20).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    assert count_queries() == queries_for_few, (
+        "Убедитесь, что число запросов к БД на странице списка публикаций в"
+        " админке не зависит от числа строк."
+    )
+    content = admin_client.get("/admin/blog/post/").content.decode("utf-8")
+    assert 'name="form-0-text"' not in content
+
+
+def test_post_text_is_edited_inline_on_demand(
+        admin_client, mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, text="Старый"
+    )
+    url = f"/admin/blog/post/{post.id}/text/"
+    content = admin_client.get("/admin/blog/post/").content.decode("utf-8")
+    assert f'data-url="{url}"' in content, (
+        "Убедитесь, что текст публикации можно изменить прямо из списка."
+    )
+    assert 'name="text"' in admin_client.get(url).content.decode("utf-8")
+
+    response = admin_client.post(url, {"text": "Новый текст"})
+    assert response.json() == {"preview": "Новый текст"}
+    post.refresh_from_db()
+    assert post.text == "Новый текст"
+    assert admin_client.post(url, {"text": ""}).status_code == 400
+
+
+def test_location_autocomplete_uses_prefix_search(admin_client, mixer):
+    mixer.blend("blog.Location", name="Москва")
+    mixer.blend("blog.Location", name="Подмосковье")
+    response = admin_client.get(
+        "/admin/autocomplete/",
+        {
+            "term": "Мос",
+            "app_label": "blog",
+            "model_name": "post",
+            "field_name": "location",
+        },
+    )
+    assert response.status_code == 200
+    names = [item["text"] for item in response.json()["results"]]
+    assert names == ["Москва"], (
+        "Убедитесь, что автодополнение местоположений ищет по началу"
+        " названия."
+    )
+
+
+def test_prefix_search_uses_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM auth_user "
+            "WHERE username LIKE %s ESCAPE '\\'",
+            ["adm%"],
+        )
+        plan = " ".join(str(row) for row in cursor.fetchall())
+    assert "USING INDEX" in plan or "USING COVERING INDEX" in plan
+
+
+def test_post_change_form_has_no_full_table_selects(
+        admin_client, mixer, user, published_category
+):
+    mixer.cycle(5).blend("blog.Location")
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    response = admin_client.get(f"/admin/blog/post/{post.id}/change/")
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    assert content.count("<option") <= 5, (
+        "Убедитесь, что на странице редактирования публикации в админке"
+        " автор, местоположение и категория выбираются через автодополнение."
+    )
+
+
+@pytest.fixture
+def many_comments(mixer, user, published_category):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    return mixer.cycle(5).blend("blog.Comment", post=post, author=user)
+
+
+def test_comment_search_by_author_username(
+        admin_client, many_comments, another_user, mixer
+):
+    post = many_comments[0].post
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    response = admin_client.get(
+        "/admin/blog/comment/", {"q": another_user.username}
+    )
+    assert response.status_code == 200
+    assert response.context["cl"].result_count == 1, (
+        "Убедитесь, что в админке комментарии ищутся по имени автора."
+    )
+
+
+def test_comment_search_finds_words_inside_text(
+        admin_client, many_comments, another_user, mixer
+):
+    post = many_comments[0].post
+    mixer.blend(
+        "blog.Comment", post=post, author=another_user,
+        text="Пишу из Москвы поздним вечером",
+    )
+    for term in ("москв вечер", f"{another_user.username} поздним"):
+        response = admin_client.get("/admin/blog/comment/", {"q": term})
+        assert response.context["cl"].result_count == 1, (
+            "Убедитесь, что в админке комментарии ищутся по словам текста"
+            " и имени автора."
+        )
+    response = admin_client.get("/admin/blog/comment/", {"q": "москв утром"})
+    assert response.context["cl"].result_count == 0
+
+
+def test_comment_search_uses_indexes(rf, admin_user, many_comments):
+    comment_admin = admin.site._registry[Comment]
+    request = rf.get("/admin/blog/comment/")
+    request.user = admin_user
+    queryset, _ = comment_admin.get_search_results(
+        request, comment_admin.get_queryset(request), "adm текст"
+    )
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    scans = [
+        step for step in plan
+        if step.startswith("SCAN") and "VIRTUAL TABLE" not in step
+    ]
+    assert not scans, (
+        "Убедитесь, что поиск комментариев в админке не перебирает таблицы:"
+        f" {plan}"
+    )
+
+
+def test_comment_bulk_moderation_runs_single_statement(
+        admin_client, many_comments
+):
+    ids = [comment.id for comment in many_comments]
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.post(
+            "/admin/blog/comment/",
+            {"action": "hide_comments", "_selected_action": ids},
+        )
+    assert response.status_code == 302
+    updates = [
+        query for query in context.captured_queries
+        if query["sql"].startswith('UPDATE "blog_comment"')
+    ]
+    assert len(updates) == 1, (
+        "Убедитесь, что массовое скрытие комментариев выполняется одним"
+        " UPDATE."
+    )
+    post = many_comments[0].post
+    assert not post.comment.filter(is_published=True).exists()
+
+    response = admin_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert not list(response.context["comments"])
@@ -0,0 +1,159 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache, caches
+from django.utils.module_loading import import_string
+
+from blogicum import settings as project_settings
+from core.cache import CacheMetrics, LockedFileBasedCache, LRUStore
+from core.changelog import ChangeLog
+
+
+@pytest.fixture
+def file_cache(tmp_path):
+    # Общий кэш из настроек проекта: conftest заменяет его на LocMemCache.
+    params = project_settings.CACHES[project_settings.SHARED_CACHE_ALIAS]
+    return import_string(params["BACKEND"])(str(tmp_path), params)
+
+
+def test_values_are_served_from_l1():
+    cache.metrics.reset()
+    cache.set("key", {"value": 1})
+    caches["shared"].set("key", "changed-by-other-process")
+    assert cache.get("key") == {"value": 1}
+    cache.delete("key")
+    assert cache.get("key") is None
+    stats = cache.get_stats()
+    assert stats["l1_hits"] == 1
+    assert stats["misses"] == 1
+
+    caches["shared"].set("other", 2)
+    assert cache.get("other") == 2
+    assert cache.get("other") == 2
+    stats = cache.get_stats()
+    assert stats["l2_hits"] == 1
+    assert stats["l1_hits"] == 2
+
+
+def test_l1_evicts_least_recently_used_by_size():
+    metrics = CacheMetrics()
+    store = LRUStore(max_bytes=300, metrics=metrics)
+    for n in range(3):
+        store.set(n, "x" * 80, None)
+    store.get(0)
+    store.set(3, "x" * 80, None)
+    assert store.size <= 300
+    assert store.get(0) == "x" * 80, "Недавно прочитанный ключ вытеснен."
+    assert store.get(1) != "x" * 80
+    assert metrics.snapshot()["evictions"] == 1
+    store.set("huge", "x" * 1000, None)
+    assert len(store) <= 3
+
+
+def test_get_or_set_computes_cold_key_once():
+    calls = []
+
+    def render():
+        calls.append(1)
+        time.sleep(0.1)
+        return "страница"
+
+    results = []
+
+    def request():
+        results.append(cache.get_or_set("blog:index", render))
+
+    threads = [threading.Thread(target=request) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["страница"] * 10
+    assert len(calls) == 1, (
+        "Убедитесь, что при одновременных промахах значение вычисляется"
+        " один раз."
+    )
+    assert cache.get_stats()["coalesced"] >= 9
+
+
+def test_get_or_set_waits_for_other_process():
+    shared = caches["shared"]
+    shared.add("blog:index:lock", 1, 30)
+
+    def other_process():
+        time.sleep(0.1)
+        shared.set("blog:index", "готово")
+
+    thread = threading.Thread(target=other_process)
+    thread.start()
+    value = cache.get_or_set("blog:index", pytest.fail)
+    thread.join()
+    assert value == "готово"
+
+
+def test_file_cache_add_and_incr_are_atomic(tmp_path):
+    shared = LockedFileBasedCache(str(tmp_path), {})
+    shared.set("counter", 0)
+    added = []
+
+    def work():
+        added.append(shared.add("lock", 1))
+        for _ in range(4):
+            shared.incr("counter")
+
+    threads = [threading.Thread(target=work) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert added.count(True) == 1
+    assert shared.get("counter") == 20, (
+        "Убедитесь, что incr общего файлового кэша не теряет приращения."
+    )
+
+
+def test_file_cache_incr_keeps_expiry(file_cache, monkeypatch):
+    file_cache.add("counter", 10, None)
+    file_cache.set("short", 1, 60)
+    assert file_cache.incr("counter") == 11
+    assert file_cache.incr("short") == 2
+    later = time.time() + 3600
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert file_cache.get("counter") == 11, (
+        "Убедитесь, что incr не задаёт бессрочному счётчику срок хранения."
+    )
+    assert file_cache.get("short") is None
+    with pytest.raises(ValueError):
+        file_cache.incr("short")
+
+
+def test_change_log_counter_outlives_default_timeout(file_cache, monkeypatch):
+    log = ChangeLog("posts", cache=file_cache)
+    start = log.last()
+    log.publish("первое")
+    log.publish("второе")
+    later = time.time() + file_cache.default_timeout + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert log.last() == start + 2, (
+        "Убедитесь, что счётчик журнала изменений не истекает."
+    )
+    assert log.read(start, log.last()) == ["первое", "второе"]
+
+
+def test_file_cache_culls_expired_entries_first(file_cache, tmp_path):
+    assert file_cache._max_entries > 300, (
+        "Убедитесь, что для общего кэша задан MAX_ENTRIES."
+    )
+    shared = LockedFileBasedCache(
+        str(tmp_path / "small"),
+        {"OPTIONS": {"MAX_ENTRIES": 3, "CULL_FREQUENCY": 1}},
+    )
+    shared.set("session", "данные", None)
+    shared.set("stale-1", 1, 0)
+    shared.set("stale-2", 2, 0)
+    shared.set("page", "страница")
+    assert shared.get("session") == "данные", (
+        "Убедитесь, что при переполнении сначала удаляются истёкшие записи."
+    )
+    assert shared.get("page") == "страница"
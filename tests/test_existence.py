@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.existence import ExistenceIndex, post_ids
+from core.bloom import BloomFilter
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter.from_values(range(1000), error_rate=0.01)
+    assert all(value in bloom for value in range(1000))
+    false_positives = sum(
+        value in bloom for value in range(1000, 11000)
+    )
+    assert false_positives < 300
+
+
+def get_without_queries(client, url):
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 404
+    assert not context.captured_queries, (
+        f"Убедитесь, что ответ 404 для `{url}` не обращается к БД."
+    )
+    return response
+
+
+@pytest.mark.parametrize("url", [
+    "/posts/987654/",
+    "/profile/nobody-here/",
+    "/category/no-such-category/",
+])
+def test_missing_objects_answer_404_without_db(
+        client, user_client, user, url
+):
+    content = get_without_queries(client, url).content.decode()
+    assert url in content, (
+        "Убедитесь, что на странице 404 указан запрошенный адрес."
+    )
+    response = user_client.get(url)
+    assert response.status_code == 404
+    assert user.username in response.content.decode(), (
+        "Убедитесь, что в шапке страницы 404 имя текущего пользователя."
+    )
+
+
+def test_new_post_is_found_after_filter_was_built(
+        client, user, published_category, mixer
+):
+    assert not post_ids.might_exist(10 ** 6)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    assert client.get(f"/posts/{post.id}/").status_code == 200
+    assert client.get(f"/profile/{user.username}/").status_code == 200
+
+
+def test_other_process_applies_new_values_without_rebuild(
+        django_capture_on_commit_callbacks
+):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return [1, 2]
+
+    writer = ExistenceIndex("test", load)
+    other_process = ExistenceIndex("test", load)
+    assert not other_process.might_exist(3)
+    with django_capture_on_commit_callbacks(execute=True):
+        writer.add(3)
+    assert other_process.might_exist(3), (
+        "Убедитесь, что другие процессы сразу узнают о новых записях."
+    )
+    assert len(loads) == 1, (
+        "Убедитесь, что новое значение добавляется в фильтр без его"
+        " перестройки."
+    )
@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.feedindex import FeedEntries, FeedIndexCache, FeedScope, feed_index
+from blog.jobs import reconcile_feed_index
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_scope_keeps_order_and_hides_future():
+    scope = FeedScope()
+    for key, pk in [(10, 3), (5, 1), (10, 2), (20, 4)]:
+        scope.insert(key, pk)
+    assert scope.page_ids(now_key=15, start=0, stop=10) == [3, 2, 1]
+    assert scope.page_ids(now_key=25, start=1, stop=3) == [3, 2]
+    scope.remove(10, 2)
+    assert scope.page_ids(now_key=25, start=0, stop=10) == [4, 3, 1]
+
+
+def test_feed_entries_are_kept_sorted_by_id():
+    entries = FeedEntries()
+    for pk in (7, 3, 5):
+        entries.append(pk, (pk * 10, 1, 2))
+    entries.sort()
+    entries.set(4, (40, 1, 2))
+    entries.set(7, (70, 3, 2))
+    assert entries.pop(5) == (50, 1, 2)
+    assert entries.pop(6) is None
+    assert list(entries.items()) == [
+        (3, (30, 1, 2)), (4, (40, 1, 2)), (7, (70, 3, 2)),
+    ]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    now = timezone.now()
+    return [
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, pub_date=now - timedelta(minutes=n),
+        )
+        for n in range(15)
+    ]
+
+
+def test_index_page_selects_posts_by_primary_key(client, posts):
+    client.get("/")
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/?page=2")
+    post_queries = [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+    ]
+    assert len(post_queries) == 1
+    assert '"blog_post"."id" IN (' in post_queries[0], (
+        "Убедитесь, что лента выбирает строки страницы по id из индекса."
+    )
+    assert [post.id for post in response.context["page_obj"]] == [
+        post.id for post in posts[10:]
+    ]
+    assert response.context["page_obj"].paginator.count == len(posts)
+
+
+def test_index_follows_post_changes(
+        client, posts, mixer, user, monkeypatch,
+        django_capture_on_commit_callbacks
+):
+    client.get("/")
+    hidden = posts[0]
+    hidden.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        hidden.save()
+    first_page = [post.id for post in client.get("/").context["page_obj"]]
+    assert hidden.id not in first_page
+    assert first_page[0] == posts[1].id
+
+    with django_capture_on_commit_callbacks(execute=True):
+        scheduled = mixer.blend(
+            "blog.Post", author=user, category=posts[0].category,
+            is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+        )
+    assert scheduled.id not in [post.id for post in feed_index.feed()[0:20]]
+    later = timezone.now() + timedelta(hours=2)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    assert [post.id for post in feed_index.feed()[0:1]] == [scheduled.id], (
+        "Убедитесь, что отложенная публикация появляется в ленте, когда"
+        " наступает её время."
+    )
+
+
+def test_other_process_applies_changes_without_rebuild(
+        posts, django_capture_on_commit_callbacks
+):
+    other_process = FeedIndexCache()
+    index = other_process.get()
+    hidden = posts[0]
+    hidden.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        hidden.save()
+    assert other_process.get() is index, (
+        "Убедитесь, что другие процессы применяют изменения публикаций к"
+        " индексу, а не перестраивают его."
+    )
+    assert len(other_process.feed()) == len(posts) - 1
+
+    feed_index.invalidate()
+    assert other_process.get() is not index
+    assert len(other_process.feed()) == len(posts) - 1
+
+
+def test_rolled_back_change_is_not_applied(posts):
+    count = len(feed_index.feed())
+    hidden = posts[0]
+    hidden.is_published = False
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            hidden.save()
+            raise RuntimeError
+    assert len(feed_index.feed()) == count, (
+        "Убедитесь, что индекс лент меняется только после фиксации"
+        " транзакции."
+    )
+
+
+def test_reconcile_job_fixes_writes_bypassing_signals(
+        posts, mixer, user, django_capture_on_commit_callbacks
+):
+    other_process = FeedIndexCache()
+    index = other_process.get()
+    feed_index.get()
+    Post.objects.filter(pk=posts[0].pk).update(is_published=False)
+    Post.objects.bulk_create([Post(
+        title="Импорт", text="Текст", author=user,
+        category=posts[0].category, is_published=True,
+        pub_date=timezone.now() - timedelta(hours=1),
+    )])
+    with django_capture_on_commit_callbacks(execute=True):
+        reconcile_feed_index({})
+    assert other_process.get() is index, (
+        "Убедитесь, что сверка индекса лент не перестраивает его в"
+        " процессах сайта."
+    )
+    ids = [post.id for post in other_process.feed()[0:20]]
+    assert posts[0].id not in ids
+    assert len(ids) == len(posts)
@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.http import HttpResponse
+
+from core.holes import cache_page_with_holes, fill_holes, render_hole
+
+pytestmark = [pytest.mark.django_db]
+
+
+def is_rendered(response):
+    return "blog/detail.html" in [t.name for t in response.templates]
+
+
+@pytest.fixture
+def post_page(post_with_published_location, user, another_user, mixer):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    return f"/posts/{post.id}/"
+
+
+def test_logged_in_users_get_cached_page_with_own_fragments(
+        unlogged_client, user_client, another_user_client, post_page,
+        user, another_user
+):
+    first = unlogged_client.get(post_page)
+    assert is_rendered(first)
+    assert "csrfmiddlewaretoken" not in first.content.decode()
+
+    for client, owner, stranger in (
+            (user_client, user, another_user),
+            (another_user_client, another_user, user),
+    ):
+        response = client.get(post_page)
+        content = response.content.decode()
+        assert not is_rendered(response), (
+            "Убедитесь, что страница публикации для вошедшего пользователя"
+            " отдаётся из кэша."
+        )
+        assert f">{owner.username}</a>" in content, (
+            "Убедитесь, что в шапке страницы из кэша имя текущего"
+            " пользователя."
+        )
+        assert f">{stranger.username}</a></button>" not in content
+        assert "csrfmiddlewaretoken" in content, (
+            "Убедитесь, что форма комментария на странице из кэша содержит"
+            " CSRF-токен."
+        )
+        assert "<!--hole:" not in content
+
+    author_page = user_client.get(post_page).content.decode()
+    reader_page = another_user_client.get(post_page).content.decode()
+    assert "Отредактировать публикацию" in author_page
+    assert "Отредактировать публикацию" not in reader_page
+    assert "Отредактировать комментарий" in reader_page
+    assert "Отредактировать комментарий" not in author_page
+
+
+def test_page_cache_is_dropped_on_write(
+        user_client, post_with_published_location, post_page, user, mixer
+):
+    user_client.get(post_page)
+    mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user,
+        text="Свежий комментарий",
+    )
+    response = user_client.get(post_page)
+    assert is_rendered(response)
+    assert "Свежий комментарий" in response.content.decode()
+
+
+def test_login_keeps_page_cache_and_rename_drops_it(
+        client, user_client, post_page, user
+):
+    client.get(post_page)
+    client.force_login(user)
+    user.save(update_fields=["last_login"])
+    assert not is_rendered(client.get(post_page)), (
+        "Убедитесь, что вход пользователя не сбрасывает кэш страниц."
+    )
+    user.username = "renamed-author"
+    user.save()
+    response = user_client.get(post_page)
+    assert is_rendered(response)
+    assert "renamed-author" in response.content.decode()
+
+
+def test_hidden_post_is_not_cached(user_client, unlogged_client, mixer, user):
+    post = mixer.blend("blog.Post", author=user, is_published=False)
+    url = f"/posts/{post.id}/"
+    assert "private" in user_client.get(url)["Cache-Control"]
+    assert is_rendered(user_client.get(url))
+    assert unlogged_client.get(url).status_code == 404
+
+
+def test_tampered_hole_is_dropped(rf, user):
+    request = rf.get("/")
+    request.user = user
+    request.punch_holes = True
+    placeholder = render_hole(request, "user_menu", {})
+    request.punch_holes = False
+    assert user.username in fill_holes(placeholder, request)
+    assert fill_holes("<!--hole:forged-->", request) == ""
+
+
+def test_cold_page_is_rendered_once_for_concurrent_requests(rf):
+    calls = []
+    lock = threading.Lock()
+
+    @cache_page_with_holes(())
+    def view(request):
+        with lock:
+            calls.append(1)
+        time.sleep(0.2)
+        return HttpResponse("Страница")
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        responses = list(pool.map(lambda _: view(rf.get("/cold/")), range(5)))
+    assert all(response.content.decode() == "Страница" for response in responses)
+    assert len(calls) == 1, (
+        "Убедитесь, что одновременные промахи кэша страниц рисуют страницу"
+        " один раз."
+    )
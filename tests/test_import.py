@@ -0,0 +1,123 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.importer import import_posts
+from blog.models import Post
+from jobs.models import Job
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_record(user, category, location, n, **extra):
+    record = {
+        "title": f"Импорт {n}",
+        "text": f"Текст {n}",
+        "pub_date": "2024-01-01T12:00:00",
+        "author": user.username,
+        "category": category.slug,
+        "location": location.name,
+    }
+    record.update(extra)
+    return json.dumps(record, ensure_ascii=False)
+
+
+def test_import_command_creates_posts_in_batches(
+        tmp_path, user, published_category, published_location, capsys
+):
+    lines = [
+        make_record(user, published_category, published_location, n)
+        for n in range(25)
+    ]
+    lines.append(make_record(
+        user, published_category, published_location, 25,
+        author="nobody",
+    ))
+    lines.append("{broken")
+    path = tmp_path / "posts.ndjson"
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+    call_command("import_posts", str(path), batch_size=10)
+
+    assert Post.objects.filter(title__startswith="Импорт").count() == 25
+    post = Post.objects.get(title="Импорт 3")
+    assert post.author == user
+    assert post.category == published_category
+    assert post.location == published_location
+    output = capsys.readouterr()
+    assert "Импортировано публикаций: 25" in output.out
+    assert "nobody" in output.err
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, "JPEG")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.end_headers()
+        self.wfile.write(buffer.getvalue())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    server = HTTPServer(("127.0.0.1", 0), ImageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_import_fetches_images(
+        user, published_category, published_location, image_server
+):
+    lines = [
+        make_record(
+            user, published_category, published_location, n,
+            image=f"{image_server}/picture{n}.jpg",
+        )
+        for n in range(3)
+    ]
+    report = import_posts(lines, fetch_images=True, workers=3)
+    assert report.created == 3
+    assert not report.errors
+    thumbnail_jobs = {
+        job.payload["post_id"]: job.payload["image"]
+        for job in Job.objects.filter(name="blog.make_post_thumbnail")
+    }
+    for post in Post.objects.filter(title__startswith="Импорт"):
+        assert post.image.name.startswith("posts_images/picture")
+        assert default_storage.exists(post.image.name)
+        assert thumbnail_jobs.get(post.id) == post.image.name, (
+            "Убедитесь, что для загруженных при импорте фото ставятся"
+            " задачи миниатюр."
+        )
+        default_storage.delete(post.image.name)
+
+
+def test_import_purges_feeds_from_proxy(
+        settings, user, published_category, published_location
+):
+    settings.SURROGATE_PURGE_URL = "http://proxy.invalid/purge"
+    lines = [
+        make_record(user, published_category, published_location, n)
+        for n in range(3)
+    ]
+    import_posts(lines)
+    jobs = Job.objects.filter(name="blog.purge_surrogate_keys")
+    assert len(jobs) == 1, (
+        "Убедитесь, что после импорта ставится одна очистка прокси."
+    )
+    assert set(jobs[0].payload["keys"]) == {
+        "feed", f"author:{user.id}", f"category:{published_category.slug}",
+    }
@@ -0,0 +1,184 @@
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage, send_mail
+from django.test import override_settings
+
+from jobs.mail import EmailDispatcher
+from jobs.models import Job
+from blog.models import Comment, PostCommentCount
+from jobs.queue import enqueue, get_spec, job, schedule_periodic
+from jobs.testing import LocalSMTPServer
+from jobs.worker import Worker
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@job("tests.record")
+def record(payload):
+    calls.append(payload)
+
+
+@job("tests.record_batch", batch=True)
+def record_batch(payloads):
+    calls.append(payloads)
+
+
+@job("tests.broken", max_attempts=2, retry_delay=0)
+def broken(payload):
+    raise ValueError("сломано")
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+def test_worker_runs_and_removes_jobs():
+    enqueue("tests.record", {"n": 1})
+    enqueue("tests.record", {"n": 2})
+    assert Worker().run_once() == 2
+    assert calls == [{"n": 1}, {"n": 2}]
+    assert not Job.objects.exists()
+
+
+def test_batch_job_gets_all_payloads_at_once():
+    for n in range(3):
+        enqueue("tests.record_batch", {"n": n})
+    Worker().run(once=True)
+    assert calls == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+
+
+def test_failed_job_is_retried_then_marked_failed():
+    enqueue("tests.broken")
+    worker = Worker()
+    worker.run_once()
+    failed_job = Job.objects.get()
+    assert failed_job.status == Job.PENDING
+    assert failed_job.attempts == 1
+    assert "сломано" in failed_job.last_error
+    worker.run_once()
+    failed_job.refresh_from_db()
+    assert failed_job.status == Job.FAILED
+    assert worker.run_once() == 0
+
+
+def test_delayed_job_waits():
+    enqueue("tests.record", {"n": 1}, delay=60)
+    assert Worker().run_once() == 0
+    assert not calls
+
+
+@override_settings(
+    EMAIL_BACKEND="jobs.backends.QueuedEmailBackend",
+    JOBS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+def test_emails_are_sent_by_worker():
+    send_mail("Тема", "Текст", "from@example.com", ["to@example.com"])
+    assert not mail.outbox, (
+        "Убедитесь, что письма не отправляются в потоке запроса."
+    )
+    assert Job.objects.filter(name="jobs.send_email").count() == 1
+    Worker().run(once=True)
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == "Тема"
+    assert mail.outbox[0].to == ["to@example.com"]
+
+
+def test_thumbnail_is_made_in_background(post_with_published_location):
+    post = post_with_published_location
+    assert not post.thumbnail
+    assert Job.objects.filter(name="blog.make_post_thumbnail").exists()
+    Worker().run(once=True)
+    post.refresh_from_db()
+    assert post.thumbnail.name.endswith(".jpg")
+    post.thumbnail.storage.delete(post.thumbnail.name)
+
+
+@pytest.fixture
+def smtp_server(settings):
+    with LocalSMTPServer() as server:
+        settings.EMAIL_HOST = "127.0.0.1"
+        settings.EMAIL_PORT = server.port
+        settings.EMAIL_BACKEND = "jobs.backends.QueuedEmailBackend"
+        settings.JOBS_EMAIL_BACKEND = (
+            "django.core.mail.backends.smtp.EmailBackend"
+        )
+        yield server
+
+
+def test_queued_emails_share_one_smtp_connection(smtp_server):
+    for n in range(5):
+        send_mail(f"Письмо {n}", "Текст", "from@example.com",
+                  [f"user{n}@example.com"])
+    Worker().run(once=True)
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 1, (
+        "Убедитесь, что пачка писем отправляется через одно соединение."
+    )
+    assert smtp_server.messages[0]["to"] == ["<user0@example.com>"]
+
+
+def test_only_failed_emails_are_retried(smtp_server):
+    smtp_server.rejected.add("bad@example.com")
+    for to in ("one@example.com", "bad@example.com", "two@example.com"):
+        send_mail("Тема", "Текст", "from@example.com", [to])
+    Worker().run_once()
+    assert len(smtp_server.messages) == 2
+    retry = Job.objects.get(name="jobs.send_email")
+    assert retry.payload["to"] == ["bad@example.com"], (
+        "Убедитесь, что повторяются только неотправленные письма пачки."
+    )
+    assert retry.attempts == 1
+
+    smtp_server.rejected.clear()
+    Job.objects.update(run_at=retry.created_at)
+    Worker().run_once()
+    assert len(smtp_server.messages) == 3
+    assert not Job.objects.exists()
+
+
+def test_dispatcher_respects_rate_limit(smtp_server, monkeypatch):
+    clock = {"now": 100.0, "slept": 0.0}
+
+    def sleep(seconds):
+        clock["now"] += seconds
+        clock["slept"] += seconds
+
+    monkeypatch.setattr("jobs.mail.time.time", lambda: clock["now"])
+    monkeypatch.setattr("jobs.mail.time.sleep", sleep)
+    messages = [
+        EmailMessage(
+            "Тема", "Текст", "from@example.com", ["to@example.com"]
+        )
+        for _ in range(3)
+    ]
+    # Две пачки, как у двух обработчиков очереди, делят один лимит.
+    assert EmailDispatcher(rate=10).send(messages) == 3
+    assert EmailDispatcher(rate=10).send(messages) == 3
+    assert len(smtp_server.messages) == 6
+    assert clock["slept"] == pytest.approx(0.5), (
+        "Убедитесь, что лимит скорости рассылки общий для всех пачек и"
+        " обработчиков."
+    )
+
+
+def test_counters_are_reconciled_by_periodic_job(
+        post_with_published_location, user, mixer
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    Comment.objects.filter(post=post).update(is_published=False)
+    PostCommentCount.objects.filter(post=post).delete()
+
+    schedule_periodic(get_spec("blog.reconcile_counters"))
+    Worker().run_once()
+    assert PostCommentCount.objects.get(post=post).count == 0, (
+        "Убедитесь, что фоновая сверка пересчитывает счётчики комментариев."
+    )
+    assert Job.objects.filter(
+        name="blog.reconcile_counters", status=Job.PENDING
+    ).count() == 1, (
+        "Убедитесь, что периодическая задача ставится в очередь снова."
+    )
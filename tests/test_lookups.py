@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_queries(client, url, status=200):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == status
+    return [query["sql"] for query in context.captured_queries]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category, published_location):
+    return mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, pub_date=timezone.now(),
+    )
+
+
+@pytest.mark.parametrize("url", ["/", "category", "profile"])
+def test_feed_does_not_query_lookup_tables(client, feed_posts, url):
+    post = feed_posts[0]
+    url = {
+        "category": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{post.author.username}/",
+    }.get(url, url)
+    client.get(url)
+    queries = get_queries(client, url)
+    assert not [
+        sql for sql in queries
+        if '"blog_category"' in sql or '"blog_location"' in sql
+    ], (
+        "Убедитесь, что лента берёт категории и местоположения из кэша,"
+        " а не из БД."
+    )
+    content = client.get(url).content.decode("utf-8")
+    assert post.category.title in content
+    assert post.location.name in content
+
+
+def test_category_change_resets_lookup_cache(client, feed_posts):
+    category = feed_posts[0].category
+    url = f"/category/{category.slug}/"
+    client.get(url)
+    category.is_published = False
+    category.save()
+    assert client.get(url).status_code == 404
+    assert not list(client.get("/").context["page_obj"])
+
+    category.is_published = True
+    category.title = "Новое название"
+    category.save()
+    assert "Новое название" in client.get(url).content.decode("utf-8")
@@ -0,0 +1,50 @@
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+
+from blog.models import Comment, Post
+from core.markup import get_renderer
+
+pytestmark = [pytest.mark.django_db]
+
+
+def shout(text):
+    return f"<strong>{text.upper()}</strong>"
+
+
+def test_post_and_comment_html_is_stored_on_save(
+        client, post_with_published_location, another_user, mixer
+):
+    post = post_with_published_location
+    post.text = "Строка <b>1</b>\nСтрока 2"
+    post.save()
+    comment = mixer.blend(
+        "blog.Comment", post=post, author=another_user, text="А\nБ"
+    )
+    post.refresh_from_db()
+    comment.refresh_from_db()
+    assert post.text_html == "Строка &lt;b&gt;1&lt;/b&gt;<br>Строка 2"
+    assert comment.text_html == "А<br>Б"
+
+    content = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert post.text_html in content, (
+        "Убедитесь, что страница публикации выводит сохранённый HTML текста."
+    )
+    assert comment.text_html in content
+
+
+def test_renderer_is_pluggable_and_backfilled(
+        post_with_published_location, another_user, mixer
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=another_user, text="ок")
+    get_renderer.cache_clear()
+    try:
+        with override_settings(MARKUP_RENDERER="tests.test_markup.shout"):
+            call_command("backfill_posts")
+    finally:
+        get_renderer.cache_clear()
+    post.refresh_from_db()
+    assert post.text_html == f"<strong>{post.text.upper()}</strong>"
+    assert Comment.objects.get().text_html == "<strong>ОК</strong>"
+    assert Post.objects.get().excerpt
@@ -0,0 +1,57 @@
+import pytest
+from django.core import mail
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.worker import Worker
+
+pytestmark = [pytest.mark.django_db]
+
+
+def run_due_jobs():
+    Job.objects.update(run_at=timezone.now())
+    Worker().run(once=True)
+
+
+def test_comments_are_coalesced_into_one_digest(
+        mixer, user, another_user, another_user_client, published_category
+):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    for n in range(5):
+        another_user_client.post(
+            f"/posts/{post.id}/comment/", {"text": f"Комментарий {n}"}
+        )
+    assert Job.objects.filter(name="blog.send_comment_digest").count() == 1, (
+        "Убедитесь, что комментарии к публикации объединяются в одну задачу"
+        " на отправку письма."
+    )
+    assert not mail.outbox
+
+    run_due_jobs()
+    assert len(mail.outbox) == 1
+    message = mail.outbox[0]
+    assert message.to == [user.email]
+    for n in range(5):
+        assert f"Комментарий {n}" in message.body
+    assert post.get_absolute_url() in message.body
+
+
+def test_own_comments_do_not_notify(mixer, user, user_client,
+                                    published_category):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Сам себе"})
+    assert not Job.objects.filter(name="blog.send_comment_digest").exists()
+
+
+def test_new_digest_after_previous_was_sent(
+        mixer, user, another_user, another_user_client, published_category
+):
+    post = mixer.blend("blog.Post", author=user, category=published_category)
+    url = f"/posts/{post.id}/comment/"
+    another_user_client.post(url, {"text": "Первый"})
+    run_due_jobs()
+    another_user_client.post(url, {"text": "Второй"})
+    run_due_jobs()
+    assert len(mail.outbox) == 2
+    assert "Первый" not in mail.outbox[1].body
+    assert "Второй" in mail.outbox[1].body
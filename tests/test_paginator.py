@@ -0,0 +1,66 @@
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.models import Post
+from core.paginator import FeedPaginator
+
+
+def test_elided_page_range_is_bounded():
+    paginator = FeedPaginator(range(100_000), 10)
+    page = paginator.get_page(5000)
+    page_range = page.elided_page_range
+    assert len(page_range) < 15, (
+        "Убедитесь, что пагинатор отдаёт в шаблон не все номера страниц,"
+        " а только первую, последнюю и соседние с текущей."
+    )
+    assert page_range[0] == 1
+    assert page_range[-1] == paginator.num_pages
+    assert 5000 in page_range
+    assert FeedPaginator.ELLIPSIS in page_range
+
+
+@pytest.mark.django_db
+def test_count_limit_estimates_count(mixer, user, published_category):
+    mixer.cycle(25).blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now(),
+    )
+    queryset = Post.objects.order_by("-pub_date")
+
+    paginator = FeedPaginator(queryset, 2, count_limit=6)
+    page = paginator.get_page(1)
+    assert paginator.count_is_estimate
+    assert paginator.count == 6
+    assert page.has_next()
+
+    paginator = FeedPaginator(queryset, 2, count_limit=6)
+    page = paginator.get_page(10)
+    assert page.number == 10, (
+        "Убедитесь, что при приблизительном подсчёте страницы за пределами"
+        " `count_limit` остаются доступными."
+    )
+    assert page.has_next()
+
+    paginator = FeedPaginator(queryset, 2, count_limit=100)
+    paginator.get_page(1)
+    assert not paginator.count_is_estimate
+    assert paginator.count == 25
+
+
+@pytest.mark.django_db
+def test_index_paginator_renders_bounded_links(
+        mixer, user, published_category, client
+):
+    mixer.cycle(120).blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now(),
+    )
+    with override_settings(FEED_COUNT_LIMIT=None):
+        response = client.get("/?page=6")
+    content = response.content.decode("utf-8")
+    assert content.count('class="page-item') < 15, (
+        "Убедитесь, что на главной странице пагинатор выводит ограниченное"
+        " число ссылок на страницы."
+    )
+    assert 'href="?page=12"' in content
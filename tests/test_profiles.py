@@ -0,0 +1,40 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_user_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return sum(
+        'FROM "auth_user"' in query["sql"]
+        and 'INNER JOIN' not in query["sql"]
+        for query in context.captured_queries
+    )
+
+
+def test_profile_user_is_cached(unlogged_client, user):
+    url = f"/profile/{user.username}/"
+    count_user_queries(unlogged_client, url)
+    assert count_user_queries(unlogged_client, url) == 0, (
+        "Убедитесь, что повторный просмотр профиля не запрашивает"
+        " пользователя из БД."
+    )
+
+
+def test_profile_cache_is_reset_on_user_save(unlogged_client, user):
+    url = f"/profile/{user.username}/"
+    unlogged_client.get(url)
+    user.first_name = "Переименованный"
+    user.save()
+    content = unlogged_client.get(url).content.decode("utf-8")
+    assert "Переименованный" in content
+
+    old_url = url
+    user.username = f"{user.username}-new"
+    user.save()
+    assert unlogged_client.get(old_url).status_code == 404
+    assert unlogged_client.get(f"/profile/{user.username}/").status_code == 200
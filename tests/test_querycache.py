@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def get_selects(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith("SELECT")
+        and ('"blog_post"' in query["sql"] or '"blog_comment"' in query["sql"])
+    ]
+
+
+def test_post_detail_reads_are_cached_until_write(
+        client, post_with_published_location, another_user, mixer, settings
+):
+    # Проверяется кэш запросов под страницей, а не кэш самой страницы.
+    settings.PAGE_CACHE_ENABLED = False
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    assert get_selects(client, url)
+    assert not get_selects(client, url), (
+        "Убедитесь, что повторный просмотр публикации без изменений"
+        " не обращается к БД за публикацией и комментариями."
+    )
+
+    mixer.blend(
+        "blog.Comment", post=post, author=another_user, text="Новый коммент"
+    )
+    assert get_selects(client, url)
+    response = client.get(url)
+    assert len(response.context["comments"]) == 2
+
+    Comment.objects.filter(post=post).update(is_published=False)
+    response = client.get(url)
+    assert len(response.context["comments"]) == 0, (
+        "Убедитесь, что запись через update() сбрасывает кэш запросов."
+    )
+
+
+def test_cached_queryset_is_opt_in(post_with_published_location):
+    with CaptureQueriesContext(connection) as context:
+        Post.objects.filter(pk=post_with_published_location.pk).exists()
+        Post.objects.filter(pk=post_with_published_location.pk).exists()
+    assert len(context.captured_queries) == 2
+
+    queryset = Post.objects.filter(pk=post_with_published_location.pk)
+    assert queryset.cached().count() == 1
+    with CaptureQueriesContext(connection) as context:
+        assert queryset.cached().count() == 1
+    assert not context.captured_queries
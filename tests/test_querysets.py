@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize("url", ["/", "/profile/{username}/"])
+def test_feed_queries_do_not_grow_with_posts(
+        client, mixer, user, published_category, published_location, url,
+        settings
+):
+    # Запросы к БД считаются при отрисовке, а не при ответе из кэша.
+    settings.PAGE_CACHE_ENABLED = False
+    url = url.format(username=user.username)
+
+    def blend(n):
+        mixer.cycle(n).blend(
+            "blog.Post", author=user, category=published_category,
+            location=published_location, pub_date=timezone.now(),
+            is_published=True,
+        )
+
+    blend(1)
+    client.get(url)
+    few = count_queries(client, url)
+    blend(8)
+    assert count_queries(client, url) == few, (
+        "Убедитесь, что число запросов к БД на странице ленты не зависит"
+        " от числа публикаций."
+    )
+
+
+def test_for_author_hides_unpublished_from_others(
+        mixer, user, another_user, published_category
+):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    assert Post.objects.for_author(user.id, user).count() == 1
+    assert Post.objects.for_author(user.id, another_user).count() == 0
+    assert Post.objects.for_author(user.id).count() == 0
+
+
+def test_feed_reads_excerpt_instead_of_text(
+        client, mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now(), is_published=True,
+        text=" ".join(f"слово{n}" for n in range(50)),
+    )
+    assert post.excerpt == " ".join(f"слово{n}" for n in range(10)) + " …"
+    with CaptureQueriesContext(connection) as context:
+        content = client.get("/").content.decode("utf-8")
+    feed_sql = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith('SELECT "blog_post"."id"')
+    ]
+    assert feed_sql and not [
+        sql for sql in feed_sql if '"blog_post"."text"' in sql
+    ], "Убедитесь, что лента не загружает полный текст публикаций."
+    assert post.excerpt in content
+
+    post.text = "Новый текст"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == "Новый текст"
+
+
+def test_backfill_posts_fills_excerpt(mixer, user, published_category):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category
+    )
+    Post.objects.update(excerpt="")
+    call_command("backfill_posts", batch_size=2)
+    for post in posts:
+        post.refresh_from_db()
+        assert post.excerpt
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment
+from core.ratelimit import TokenBucket
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket("test", "2/m")
+    assert bucket.take(now=0) == 0
+    assert bucket.take(now=0) == 0
+    assert bucket.take(now=0) == pytest.approx(30)
+    assert bucket.take(now=30) == 0
+
+
+def test_token_bucket_is_not_overdrawn_concurrently():
+    bucket = TokenBucket("concurrent", "5/h")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: bucket.take(now=0), range(20)))
+    assert results.count(0) == 5, (
+        "Убедитесь, что одновременные запросы не забирают один и тот же"
+        " токен."
+    )
+
+
+def test_comment_flood_gets_429_without_db_work(
+        user_client, post_with_published_location, settings
+):
+    settings.RATELIMITS = {"comment": {"user": "3/m"}}
+    url = f"/posts/{post_with_published_location.id}/comment/"
+    for n in range(3):
+        response = user_client.post(url, {"text": f"Комментарий {n}"})
+        assert response.status_code == 302
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.post(url, {"text": "Лишний"})
+    assert response.status_code == 429, (
+        "Убедитесь, что при превышении лимита комментариев возвращается"
+        " статус 429."
+    )
+    assert response["Retry-After"]
+    assert not context.captured_queries, (
+        "Убедитесь, что ответ 429 отдаётся до обращения к БД."
+    )
+    assert Comment.objects.count() == 3
+
+
+def test_post_creation_is_limited_per_ip(client, user_client, settings):
+    settings.RATELIMITS = {"post": {"ip": "1/h"}}
+    assert user_client.get("/posts/create/").status_code == 200
+    user_client.post("/posts/create/", {})
+    assert user_client.post("/posts/create/", {}).status_code == 429
+    assert client.post("/posts/create/", {}).status_code == 429
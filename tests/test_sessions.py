@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def session_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        query for query in context.captured_queries
+        if "django_session" in query["sql"]
+    ]
+
+
+def test_anonymous_reader_does_not_touch_sessions(
+        client, post_with_published_location
+):
+    for url in ("/", f"/posts/{post_with_published_location.id}/"):
+        assert not session_queries(client, url), (
+            "Убедитесь, что анонимный читатель не обращается к таблице"
+            " сессий."
+        )
+    assert "sessionid" not in client.cookies
+
+
+def test_logged_in_reader_reads_session_from_cache(user_client):
+    assert not session_queries(user_client, "/"), (
+        "Убедитесь, что сессии авторизованных пользователей читаются из кэша."
+    )
+
+
+def test_purge_sessions_in_batches():
+    expired = timezone.now() - timedelta(days=1)
+    Session.objects.bulk_create(
+        Session(
+            session_key=f"expired{i:04}", session_data="",
+            expire_date=expired,
+        )
+        for i in range(25)
+    )
+    Session.objects.create(
+        session_key="alive", session_data="",
+        expire_date=timezone.now() + timedelta(days=1),
+    )
+    call_command("purge_sessions", batch_size=10, pause=0)
+    assert list(Session.objects.values_list("session_key", flat=True)) == [
+        "alive"
+    ]
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+
+from blog.models import Comment
+from blogicum.asgi import application
+from core.pubsub import CacheBroker, InProcessBroker
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_in_process_broker_delivers_from_other_threads():
+    broker = InProcessBroker()
+
+    async def scenario():
+        async with broker.subscribe("channel") as messages:
+            thread = threading.Thread(
+                target=broker.publish, args=("channel", {"id": 1})
+            )
+            thread.start()
+            message = await asyncio.wait_for(messages.__anext__(), 1)
+            thread.join()
+        return message
+
+    assert async_to_sync(scenario)() == {"id": 1}
+    assert not broker._subscribers
+
+
+def test_cache_broker_reads_cache_off_the_event_loop(monkeypatch):
+    broker = CacheBroker(poll_interval=0.01)
+    loop_threads, cache_threads = set(), set()
+    get, get_many = broker.cache.get, broker.cache.get_many
+
+    def tracked(method):
+        def wrapper(*args, **kwargs):
+            cache_threads.add(threading.get_ident())
+            return method(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(broker.cache, "get", tracked(get))
+    monkeypatch.setattr(broker.cache, "get_many", tracked(get_many))
+
+    async def scenario():
+        loop_threads.add(threading.get_ident())
+        async with broker.subscribe("channel") as messages:
+            await sync_to_async(broker.publish)("channel", {"id": 1})
+            return await asyncio.wait_for(messages.__anext__(), 1)
+
+    assert async_to_sync(scenario)() == {"id": 1}
+    assert cache_threads and not cache_threads & loop_threads, (
+        "Убедитесь, что CacheBroker не обращается к кэшу в цикле событий."
+    )
+
+
+def open_stream(post_id, headers=()):
+    incoming = asyncio.Queue()
+    sent = []
+
+    async def receive():
+        return await incoming.get()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/posts/{post_id}/comments/stream/",
+        "headers": list(headers),
+    }
+    task = asyncio.ensure_future(application(scope, receive, send))
+    return task, incoming, sent
+
+
+async def wait_for_body(sent, text):
+    for _ in range(100):
+        body = b"".join(
+            message.get("body", b"") for message in sent
+        ).decode("utf-8")
+        if text in body:
+            return body
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"В потоке нет {text!r}: {sent!r}")
+
+
+def test_stream_pushes_new_comments(
+        post_with_published_location, another_user,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+
+    def add_comment():
+        with django_capture_on_commit_callbacks(execute=True):
+            return Comment.objects.create(
+                post=post, author=another_user, text="Живой комментарий"
+            )
+
+    async def scenario():
+        task, incoming, sent = open_stream(post.id)
+        for _ in range(100):
+            if sent:
+                break
+            await asyncio.sleep(0.01)
+        assert sent[0]["status"] == 200
+        comment = await sync_to_async(add_comment)()
+        body = await wait_for_body(sent, "Живой комментарий")
+        await incoming.put({"type": "http.disconnect"})
+        await asyncio.wait_for(task, 1)
+        return comment, body
+
+    comment, body = async_to_sync(scenario)()
+    assert f"id: {comment.id}\nevent: comment\n" in body, (
+        "Убедитесь, что новые комментарии приходят в поток событий"
+        " публикации."
+    )
+
+
+def test_stream_replays_missed_comments(
+        post_with_published_location, another_user, mixer
+):
+    post = post_with_published_location
+    first, second = mixer.cycle(2).blend(
+        "blog.Comment", post=post, author=another_user
+    )
+
+    async def scenario():
+        task, incoming, sent = open_stream(
+            post.id, [(b"last-event-id", str(first.id).encode())]
+        )
+        body = await wait_for_body(sent, f"id: {second.id}\n")
+        await incoming.put({"type": "http.disconnect"})
+        await asyncio.wait_for(task, 1)
+        return body
+
+    assert f"id: {first.id}\n" not in async_to_sync(scenario)()
+
+
+def test_stream_for_missing_post_returns_404():
+    async def scenario():
+        task, _, sent = open_stream(100500)
+        await asyncio.wait_for(task, 1)
+        return sent
+
+    assert async_to_sync(scenario)()[0]["status"] == 404
+
+
+def test_detail_page_subscribes_to_stream(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    content = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert f"/posts/{post.id}/comments/stream/" in content
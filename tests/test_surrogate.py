@@ -0,0 +1,156 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from django.utils import timezone
+
+from blog.surrogate import post_keys
+from core.constants import SURROGATE_MAX_AGE, SURROGATE_UNPURGED_MAX_AGE
+from jobs.models import Job
+from jobs.worker import Worker
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_s_maxage(response):
+    return int(response["Cache-Control"].split("s-maxage=")[1].split(",")[0])
+
+
+def test_anonymous_feed_is_public_and_tagged(
+        client, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    response = client.get("/")
+    cache_control = response["Cache-Control"]
+    assert "public" in cache_control and "s-maxage" in cache_control, (
+        "Убедитесь, что ленту для анонимного пользователя может кэшировать"
+        " прокси."
+    )
+    assert "Cookie" in response["Vary"]
+    keys = response["Surrogate-Key"].split()
+    assert "feed" in keys and f"post:{post.id}" in keys
+
+    assert "private" in user_client.get("/")["Cache-Control"], (
+        "Убедитесь, что страницы вошедшего пользователя прокси не кэширует."
+    )
+
+
+def test_feed_max_age_ends_at_next_scheduled_post(
+        client, settings, mixer, user, published_category
+):
+    settings.SURROGATE_PURGE_URL = "http://proxy.invalid/purge"
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(seconds=90),
+    )
+    max_age = get_s_maxage(client.get("/"))
+    assert 0 < max_age <= 90
+
+
+def test_post_detail_keys(client, post_with_published_location):
+    post = post_with_published_location
+    keys = client.get(f"/posts/{post.id}/")["Surrogate-Key"].split()
+    assert f"post:{post.id}" in keys
+    assert f"author:{post.author_id}" in keys
+    assert f"category:{post.category.slug}" in keys
+    assert client.get(f"/posts/{post.id}/")["Surrogate-Key"].split() == keys, (
+        "Убедитесь, что страница из кэша страниц отдаётся с теми же ключами."
+    )
+
+
+def test_long_proxy_ttl_only_when_purging_is_configured(
+        client, settings, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    assert get_s_maxage(client.get(url)) <= SURROGATE_UNPURGED_MAX_AGE, (
+        "Убедитесь, что без SURROGATE_PURGE_URL прокси хранит страницы"
+        " недолго."
+    )
+    settings.SURROGATE_PURGE_URL = "http://proxy.invalid/purge"
+    assert get_s_maxage(client.get(url)) == SURROGATE_MAX_AGE
+
+
+class PurgeHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.headers, json.loads(body)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def purge_server(settings):
+    server = HTTPServer(("127.0.0.1", 0), PurgeHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.SURROGATE_PURGE_URL = (
+        f"http://127.0.0.1:{server.server_address[1]}/purge"
+    )
+    settings.SURROGATE_PURGE_HEADERS = {"Fastly-Key": "secret"}
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_changes_are_purged_in_one_batch(
+        purge_server, mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    mixer.blend("blog.Comment", post=post, author=user)
+    assert Job.objects.filter(name="blog.purge_surrogate_keys").count() >= 2
+
+    Worker().run_once()
+
+    assert len(purge_server.requests) == 1, (
+        "Убедитесь, что ключи всех задач очистки отправляются одним"
+        " запросом."
+    )
+    headers, body = purge_server.requests[0]
+    assert headers["Fastly-Key"] == "secret"
+    assert set(headers["Surrogate-Key"].split()) == set(body["surrogate_keys"])
+    assert {
+        "feed", f"post:{post.id}", f"author:{user.id}",
+        f"category:{published_category.slug}",
+    } <= set(body["surrogate_keys"])
+    assert not Job.objects.filter(name="blog.purge_surrogate_keys").exists()
+
+
+def get_purged_keys():
+    return {
+        key
+        for payload in Job.objects.filter(
+            name="blog.purge_surrogate_keys"
+        ).values_list("payload", flat=True)
+        for key in payload["keys"]
+    }
+
+
+def test_admin_moderation_and_locations_are_purged(
+        purge_server, admin_client, post_with_published_location, user, mixer
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    Job.objects.all().delete()
+    admin_client.post(
+        "/admin/blog/comment/",
+        {"action": "hide_comments", "_selected_action": [comment.id]},
+    )
+    assert f"post:{post.id}" in get_purged_keys(), (
+        "Убедитесь, что массовое скрытие комментариев очищает страницы"
+        " публикаций в прокси."
+    )
+
+    location = post.location
+    location.name = "Новое название"
+    location.save()
+    assert f"location:{location.id}" in get_purged_keys()
+    assert f"location:{location.id}" in post_keys(post)
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.updates import (MARK_CACHE_KEY, get_high_water_mark,
+                          reset_high_water_mark)
+
+pytestmark = [pytest.mark.django_db]
+
+URL = "/posts/updates/"
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(**kwargs):
+        kwargs.setdefault("pub_date", timezone.now() - timedelta(minutes=1))
+        kwargs.setdefault("is_published", True)
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category, **kwargs
+        )
+    return make
+
+
+def test_updates_return_only_new_posts(client, make_post):
+    make_post()
+    cursor = client.get(URL).json()["cursor"]
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(URL, {"after": cursor})
+    assert response.json() == {"posts": [], "cursor": cursor}
+    assert not context.captured_queries, (
+        "Убедитесь, что ответ «ничего нового» строится без запросов к БД."
+    )
+
+    new_posts = [make_post(), make_post()]
+    make_post(is_published=False)
+    data = client.get(URL, {"after": cursor}).json()
+    assert [post["id"] for post in data["posts"]] == [
+        post.id for post in sorted(new_posts, key=lambda p: (p.pub_date, p.id))
+    ]
+    assert data["cursor"] != cursor
+
+    data = client.get(URL, {"after": data["cursor"]}).json()
+    assert data["posts"] == []
+
+
+def test_scheduled_post_appears_when_due(client, make_post):
+    cursor = client.get(URL).json()["cursor"]
+    post = make_post(pub_date=timezone.now() + timedelta(seconds=1))
+    assert client.get(URL, {"after": cursor}).json()["posts"] == []
+
+    data = client.get(URL, {"after": cursor, "wait": 3}).json()
+    assert [item["id"] for item in data["posts"]] == [post.id], (
+        "Убедитесь, что отложенная публикация появляется в ленте"
+        " обновлений, когда наступает её время."
+    )
+
+
+def test_updates_reject_bad_cursor(client):
+    assert client.get(URL, {"after": "bad"}).status_code == 400
+
+
+def test_mark_is_reset_again_on_commit(
+        make_post, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        make_post()
+        reset_high_water_mark()
+        get_high_water_mark()
+    assert cache.get(MARK_CACHE_KEY) is None, (
+        "Убедитесь, что отметка, закэшированная до фиксации транзакции,"
+        " сбрасывается после неё."
+    )
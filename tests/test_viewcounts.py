@@ -0,0 +1,113 @@
+import pytest
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import PostViews
+from blog.viewcounts import get_view_count, view_counter
+from core.counters import BufferedCounter
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_writes(context):
+    return [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
+def test_views_are_counted_by_beacon_without_writes(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    page = client.get(f"/posts/{post.id}/")
+    assert "public" in page["Cache-Control"]
+    assert view_counter.pending(post.id) == 0, (
+        "Убедитесь, что кэшируемая прокси страница публикации сама"
+        " просмотры не считает."
+    )
+    url = f"/posts/{post.id}/views/"
+    with CaptureQueriesContext(connection) as context:
+        client.post(url)
+        response = client.post(url)
+    assert not get_writes(context), (
+        "Убедитесь, что просмотр публикации не пишет в БД."
+    )
+    assert response.json() == {"views": 2}
+    assert "no-store" in response["Cache-Control"], (
+        "Убедитесь, что ответ счётчика просмотров не кэшируется."
+    )
+    assert client.get(url).status_code == 405
+    assert client.post("/posts/987654/views/").status_code == 404
+
+
+def test_flush_writes_all_counts_in_one_update(
+        client, post_with_published_location, post_with_another_category
+):
+    first, second = post_with_published_location, post_with_another_category
+    for post, views in ((first, 3), (second, 2)):
+        for _ in range(views):
+            view_counter.incr(post.id)
+    view_counter.incr(10 ** 6)
+    assert get_view_count(first.id) == 3
+
+    with CaptureQueriesContext(connection) as context:
+        view_counter.flush()
+    updates = [sql for sql in get_writes(context) if sql.startswith("UPDATE")]
+    assert len(updates) == 1, (
+        "Убедитесь, что просмотры всех публикаций записываются одним UPDATE."
+    )
+    assert dict(PostViews.objects.values_list("post_id", "count")) == {
+        first.id: 3, second.id: 2,
+    }
+    assert view_counter.pending(first.id) == 0
+    assert get_view_count(first.id) == 3
+
+    view_counter.incr(first.id)
+    view_counter.flush()
+    assert get_view_count(first.id) == 4
+
+
+def test_failed_flush_keeps_counts():
+    def fail(counts):
+        raise RuntimeError
+
+    counter = BufferedCounter(fail)
+    counter.incr("a", 2)
+    with pytest.raises(RuntimeError):
+        counter.flush()
+    assert counter.pending("a") == 2
+
+
+def test_failed_batch_does_not_count_committed_batch_twice(
+        monkeypatch, post_with_published_location, post_with_another_category
+):
+    first, second = sorted(
+        (post_with_published_location, post_with_another_category),
+        key=lambda post: post.id,
+    )
+    monkeypatch.setattr("blog.viewcounts.VIEW_FLUSH_BATCH", 1)
+    view_counter.incr(first.id, 3)
+    view_counter.incr(second.id, 2)
+
+    update = QuerySet.update
+    calls = []
+
+    def fail_second_batch(queryset, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == 2:
+            raise DatabaseError
+        return update(queryset, **kwargs)
+
+    monkeypatch.setattr(QuerySet, "update", fail_second_batch)
+    with pytest.raises(DatabaseError):
+        view_counter.flush()
+    monkeypatch.setattr(QuerySet, "update", update)
+    view_counter.flush()
+    assert dict(PostViews.objects.values_list("post_id", "count")) == {
+        first.id: 3, second.id: 2,
+    }, (
+        "Убедитесь, что после ошибки во второй пачке просмотры первой"
+        " не записываются повторно."
+    )